@@ -1,16 +1,26 @@
 import streamlit as st
-import pandas as pd
 import os
 import json
 import re
-import requests
-import urllib.parse
 from arxiv_client import ArxivClient
-from paper_manager import PaperManager
+from paper_manager import PaperManager, DOWNLOAD_STATE_TTL
+from metadata_enricher import is_translation_error, translation_cache_key
+from disk_cache import DiskCache
+from json_utils import loads as json_loads
+from http_utils import create_session
 from translate import Translator
 from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import threading
 import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 将作者、分类等列表字段格式化为逗号分隔的字符串
+def format_list_field(value):
+    """列表字段用逗号连接，其他类型原样返回"""
+    return ', '.join(value) if isinstance(value, list) else value
 
 # 安全的获取字典值的函数
 def safe_get(dictionary, key, default=""):
@@ -19,9 +29,23 @@ def safe_get(dictionary, key, default=""):
         return default
     return dictionary.get(key, default)
 
+# ArxivClient和PaperManager在所有会话和重新运行之间共享同一个实例
+@st.cache_resource(show_spinner=False)
+def get_arxiv_client():
+    """获取共享的ArxivClient实例"""
+    return ArxivClient()
+
+@st.cache_resource(show_spinner=False)
+def get_paper_manager():
+    """获取共享的PaperManager实例"""
+    return PaperManager()
+
 # 初始化ArxivClient和PaperManager
-arxiv_client = ArxivClient()
-paper_manager = PaperManager()
+arxiv_client = get_arxiv_client()
+paper_manager = get_paper_manager()
+
+# st.fragment需要Streamlit>=1.37，1.35~1.36中为st.experimental_fragment
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
 
 # 设置页面配置，包括图标
 st.set_page_config(
@@ -35,114 +59,297 @@ st.title("ArXiv 综述整理工具")
 st.sidebar.title("功能")
 option = st.sidebar.radio("选择功能", ["搜索论文", "下载论文", "整理论文"])
 
+# 匹配中文字符的正则表达式，预先编译以避免每次调用时查找正则缓存
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
 # 判断文本是否包含中文
 def contains_chinese(text):
     """检查文本是否包含中文字符"""
-    return bool(re.search(r'[\u4e00-\u9fff]', text))
+    if not text:
+        return False
+    return _CJK_RE.search(text) is not None
+
+# 翻译结果在内存中的缓存有效期（秒）
+TRANSLATION_CACHE_TTL = 24 * 60 * 60
+
+# 持久化的翻译缓存，跨会话和重启复用翻译结果
+@st.cache_resource(show_spinner=False)
+def get_translation_cache():
+    """获取共享的翻译缓存"""
+    return DiskCache("translations")
+
+translation_cache = get_translation_cache()
+
+@st.cache_resource(show_spinner=False)
+def get_translation_session():
+    """获取翻译请求共用的会话，复用连接并对临时错误自动重试"""
+    return create_session()
+
+def _request_google_translate(text, to_lang, from_lang, session):
+    """向Google Translate发送一次翻译请求，失败时抛出异常"""
+    # 构建URL
+    url = "https://translate.googleapis.com/translate_a/single"
+    params = {
+        "client": "gtx",  # 使用gtx作为客户端，不需要API密钥
+        "dt": "t",        # 表示我们只需要翻译
+        "sl": from_lang,  # 源语言
+        "tl": to_lang,    # 目标语言
+        "q": text         # 要翻译的文本
+    }
+    
+    # 发送请求（复用连接池中的连接）
+    response = session.get(url, params=params, timeout=5)
+    
+    if response.status_code != 200:
+        raise RuntimeError(f"Google翻译请求失败: {response.status_code}")
+    
+    # 解析响应（Google Translate返回的是嵌套列表）
+    result = json_loads(response.content)
+    if not result or not result[0]:
+        raise RuntimeError("Google翻译返回格式异常")
+    
+    # 第一个列表包含翻译结果，我们需要合并所有翻译片段
+    return "".join(sentence[0] for sentence in result[0] if sentence and sentence[0])
 
 # 使用Google Translate进行翻译（无需API密钥的方法）
-def google_translate(text, to_lang="en", from_lang="zh"):
-    """使用Google Translate API进行翻译（无需API密钥）"""
-    try:
-        # 构建URL
-        url = "https://translate.googleapis.com/translate_a/single"
-        params = {
-            "client": "gtx",  # 使用gtx作为客户端，不需要API密钥
-            "dt": "t",        # 表示我们只需要翻译
-            "sl": from_lang,  # 源语言
-            "tl": to_lang,    # 目标语言
-            "q": text         # 要翻译的文本
-        }
-        
-        # 发送请求
-        encoded_params = urllib.parse.urlencode(params)
-        full_url = f"{url}?{encoded_params}"
-        response = requests.get(full_url, timeout=5)
-        
-        if response.status_code != 200:
-            print(f"Google翻译请求失败: {response.status_code}")
-            return text
-        
-        # 解析响应（Google Translate返回的是嵌套列表）
-        result = response.json()
-        # 第一个列表包含翻译结果，我们需要合并所有翻译片段
-        translated_text = ""
-        for sentence in result[0]:
-            if sentence[0]:
-                translated_text += sentence[0]
-        
-        return translated_text
-    except Exception as e:
-        print(f"Google翻译出错: {str(e)}")
-        return text
+def google_translate(text, to_lang="en", from_lang="zh", session=None):
+    """
+    使用Google Translate API进行翻译（无需API密钥），失败时抛出异常；
+    在线程池中调用时需传入session，get_translation_session只能在脚本线程中调用
+    """
+    cache_key = translation_cache_key(text, from_lang, to_lang)
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    translated_text = _request_google_translate(text, to_lang, from_lang, session or get_translation_session())
+    if is_translation_error(translated_text):
+        raise RuntimeError("Google翻译返回空结果")
+    
+    translation_cache.set(cache_key, translated_text)
+    return translated_text
+
+# 主要翻译服务在该时间（秒）内未返回有效结果时，同时发起Google翻译请求，取先返回的有效结果
+TRANSLATION_HEDGE_DELAY = 1.0
+
+@st.cache_resource(show_spinner=False)
+def get_translation_executor():
+    """获取翻译请求使用的线程池，与下载线程池分开以免被下载任务阻塞"""
+    return ThreadPoolExecutor(max_workers=4)
+
+def _translate_with_translator(text):
+    """使用translate库的主要翻译服务将中文翻译成英文，返回错误信息时抛出异常"""
+    translator = Translator(to_lang="en", from_lang="zh")
+    translated = translator.translate(text)
+    
+    # 检查是否为错误信息
+    if is_translation_error(translated):
+        raise RuntimeError("主要翻译API配额已用完")
+    return translated
+
+@st.cache_data(ttl=TRANSLATION_CACHE_TTL, show_spinner=False)
+def _translate_zh_to_en(text):
+    """将中文翻译成英文并缓存结果，所有翻译方法都失败时抛出异常"""
+    cache_key = translation_cache_key(text, "zh", "en")
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # 共享资源在脚本线程中获取后传给线程池中的任务，工作线程没有脚本运行上下文
+    executor = get_translation_executor()
+    session = get_translation_session()
+    
+    # 首先尝试原始翻译方法
+    primary = executor.submit(_translate_with_translator, text)
+    pending = {primary}
+    
+    # 主要翻译方法迟迟未返回或已失败时，发起Google翻译作为对冲请求
+    wait(pending, timeout=TRANSLATION_HEDGE_DELAY)
+    if not primary.done() or primary.exception() is not None:
+        pending.add(executor.submit(google_translate, text, "en", "zh", session))
+    
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                translated = future.result()
+            except Exception as e:
+                logger.warning("翻译请求失败: %s", e)
+                continue
+            
+            # 已取得有效结果，尚未开始的请求不再执行
+            for other in pending:
+                other.cancel()
+            translation_cache.set(cache_key, translated)
+            return translated
+    
+    raise RuntimeError("所有翻译方法均失败")
 
 # 改进的翻译函数，带备用方法
 def translate_to_english(text):
-    """将中文文本翻译成英文，带备用方法"""
+    """将中文文本翻译成英文，带备用方法和缓存"""
+    # 空文本或纯ASCII文本（英文、编号等）无需扫描中文字符，直接返回
+    if not text or text.isascii():
+        return text, False
+    
     if not contains_chinese(text):
         return text, False  # 不包含中文，无需翻译
     
     try:
-        # 首先尝试原始翻译方法
-        translator = Translator(to_lang="en", from_lang="zh")
-        translated = translator.translate(text)
-        
-        # 检查是否为错误信息
-        if "MYMEMORY WARNING" in translated.upper() or "QUOTA EXCEEDED" in translated.upper():
-            print("主要翻译API配额已用完，切换到Google翻译")
-            # 使用备用Google翻译
-            translated = google_translate(text, to_lang="en", from_lang="zh")
-            return translated, True
-        
-        return translated, True
-        
+        return _translate_zh_to_en(text), True
     except Exception as e:
-        print(f"主要翻译方法失败: {str(e)}，切换到Google翻译")
-        # 使用备用Google翻译
-        try:
-            translated = google_translate(text, to_lang="en", from_lang="zh")
-            return translated, True
-        except Exception as backup_e:
-            print(f"备用翻译也失败: {str(backup_e)}")
-            return text, False
+        logger.warning("翻译失败: %s", e)
+        return text, False
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_paper_details(paper_id, translate=True, _crossref_item=None):
+    """
+    获取并缓存论文详情，出错时抛出异常以免错误结果被缓存；
+    _crossref_item以下划线开头，不参与缓存键的计算
+    """
+    paper = arxiv_client.get_paper_details(paper_id, translate=translate, crossref_item=_crossref_item)
+    if "error" in paper:
+        raise RuntimeError(paper["error"])
+    return paper
+
+# 搜索完成后在后台预先获取详情的论文数量
+DETAILS_PREFETCH_LIMIT = 5
+
+def get_paper_details(paper_id, translate=True, crossref_item=None):
+    """获取论文详情，同一篇论文在缓存有效期内只请求一次"""
+    try:
+        return _cached_paper_details(paper_id, translate, crossref_item)
+    except RuntimeError as e:
+        return {"error": str(e)}
+
+def prefetch_crossref_details(papers):
+    """批量获取CrossRef论文记录，再逐篇写入详情缓存，避免每篇论文单独请求一次CrossRef"""
+    items = arxiv_client.get_crossref_items([paper['doi'] for paper in papers if paper.get('doi')])
+    for paper in papers:
+        get_paper_details(paper['id'], 'title_zh' not in paper, items.get(paper.get('doi', '').lower()))
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def get_papers_dataframe(version_token):
+    """构建已下载论文的表格，version_token（论文数据的版本标识）变化时才重新构建，旧版本的表格不再保留"""
+    # pandas只在需要表格时才导入，减少冷启动时间
+    import pandas as pd
+    
+    papers = paper_manager.get_all_papers()
+    paper_data = [{
+        "ID": paper.get('id', ''),
+        "标题": paper.get('title', ''),
+        "作者": format_list_field(paper.get('authors', '')),
+        "下载日期": paper.get('download_date', ''),
+        "本地路径": paper.get('local_path', '')
+    } for paper in papers]
+    return pd.DataFrame(paper_data, columns=["ID", "标题", "作者", "下载日期", "本地路径"])
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def get_paper_options(version_token):
+    """构建"选择论文"下拉框的选项，与论文表格使用相同的版本标识"""
+    df = get_papers_dataframe(version_token)
+    return {f"{paper_id} - {title[:50]}...": paper_id for paper_id, title in zip(df['ID'], df['标题'])}
+
+# 分类列表的缓存，修改分类后需要调用clear_paper_manager_cache
+@st.cache_data(ttl=300, show_spinner=False)
+def get_categories():
+    """获取所有分类（带缓存）"""
+    return paper_manager.get_categories()
+
+def clear_paper_manager_cache():
+    """在添加论文或分类后清除论文库缓存"""
+    get_categories.clear()
 
 # 在app.py的开头初始化部分添加
 if 'download_states' not in st.session_state:
     st.session_state.download_states = {}
 if 'download_messages' not in st.session_state:
     st.session_state.download_messages = {}
+if 'download_futures' not in st.session_state:
+    st.session_state.download_futures = {}
+
+# 超过该时长仍未结束的下载视为已中断，允许重新下载（秒）；与磁盘上下载状态的保留时长一致
+DOWNLOAD_STALE_SECONDS = DOWNLOAD_STATE_TTL
+
+# 下载状态保存在磁盘上，页面刷新或重新连接后从中恢复，
+# 由本会话发起且仍在进行的下载以会话中的状态为准
+persisted_download_states = paper_manager.get_download_states()
+for paper_id, record in persisted_download_states.items():
+    if paper_id not in st.session_state.download_futures:
+        st.session_state.download_states[paper_id] = record["state"]
+        st.session_state.download_messages[paper_id] = record["message"]
+
+def is_download_in_progress(paper_id):
+    """检查论文是否正在下载，包括其他会话或刷新前发起的下载"""
+    download_future = st.session_state.download_futures.get(paper_id)
+    if download_future is not None:
+        return not download_future.done()
+    
+    record = persisted_download_states.get(paper_id)
+    return (
+        record is not None
+        and record["state"] in ("initialized", "downloading")
+        and time.time() - record["ts"] < DOWNLOAD_STALE_SECONDS
+    )
+
+def set_download_state(paper_id, state, message):
+    """更新会话中的下载状态，并同步保存到磁盘"""
+    st.session_state.download_states[paper_id] = state
+    st.session_state.download_messages[paper_id] = message
+    paper_manager.set_download_state(paper_id, state, message)
+
+# 下载使用的线程池，在所有会话和重新运行之间共享
+@st.cache_resource(show_spinner=False)
+def get_executor():
+    """获取共享的下载线程池"""
+    return ThreadPoolExecutor(max_workers=4)
+
+# 后台预取详情使用的线程池，与下载线程池分开，预取任务不会让用户点击的下载排队等待
+@st.cache_resource(show_spinner=False)
+def get_prefetch_executor():
+    """获取共享的详情预取线程池"""
+    return ThreadPoolExecutor(max_workers=2)
+
+def submit_with_script_ctx(fn, *args, executor=None):
+    """
+    将任务提交到线程池（默认为共享的下载线程池），并为工作线程附加当前脚本运行上下文，以允许任务内更新session_state
+    """
+    ctx = get_script_run_ctx()
+    
+    def run():
+        # 线程池中的线程会被复用，每个任务开始时重新附加上下文
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+    
+    return (executor or get_executor()).submit(run)
 
 # 添加异步下载函数
 def download_paper_async(paper_id):
     """异步下载论文，不阻塞UI"""
     try:
         # 更新下载状态为"正在下载"
-        st.session_state.download_states[paper_id] = "downloading"
-        st.session_state.download_messages[paper_id] = "正在下载论文..."
+        set_download_state(paper_id, "downloading", "正在下载论文...")
         
         # 执行下载
         output_path = arxiv_client.download(paper_id)
         
         # 检查下载结果
         if isinstance(output_path, dict) and "error" in output_path:
-            st.session_state.download_states[paper_id] = "error"
-            st.session_state.download_messages[paper_id] = f"下载失败: {output_path['error']}"
+            set_download_state(paper_id, "error", f"下载失败: {output_path['error']}")
         else:
-            # 下载成功
-            st.session_state.download_states[paper_id] = "success"
-            st.session_state.download_messages[paper_id] = f"下载成功: {output_path}"
-            
-            # 添加到论文管理器
+            # 下载成功，添加到论文管理器
+            message = f"下载成功: {output_path}"
             try:
-                paper = arxiv_client.get_paper_details(paper_id)
+                paper = get_paper_details(paper_id)
                 paper_manager.add_paper(paper, output_path)
-                st.session_state.download_messages[paper_id] += " (已添加到论文管理器)"
+                clear_paper_manager_cache()
+                message += " (已添加到论文管理器)"
             except Exception as add_err:
-                st.session_state.download_messages[paper_id] += f" (添加到管理器失败: {str(add_err)})"
+                message += f" (添加到管理器失败: {str(add_err)})"
+            set_download_state(paper_id, "success", message)
     
     except Exception as e:
-        st.session_state.download_states[paper_id] = "error"
-        st.session_state.download_messages[paper_id] = f"下载出错: {str(e)}"
+        set_download_state(paper_id, "error", f"下载出错: {str(e)}")
 
 # 根据选择的功能显示不同的内容
 if option == "搜索论文":
@@ -174,8 +381,29 @@ if option == "搜索论文":
             # 执行搜索
             results = arxiv_client.search(translated_query, max_results=max_results, sort_by=sort_by, use_backup=use_backup)
             
+            # 一次性批量翻译所有标题和摘要，查看详情时无需再逐篇翻译
+            translations = arxiv_client.metadata_enricher.translate_texts(
+                [paper['title'] for paper in results] + [paper.get('summary', '') for paper in results]
+            )
+            for paper, title_zh, summary_zh in zip(results, translations[:len(results)], translations[len(results):]):
+                if title_zh is not None and summary_zh is not None:
+                    paper['title_zh'] = title_zh
+                    paper['summary_zh'] = summary_zh or "无摘要"
+            
             # 将搜索结果保存到session_state以便后续使用
             st.session_state.search_results = results
+            # 在后台预先获取排名靠前的论文详情，用户点击时可直接命中缓存
+            # 参数需与查看详情时的调用保持一致，才能命中同一条缓存
+            prefetch_papers = results[:DETAILS_PREFETCH_LIMIT]
+            crossref_papers = [paper for paper in prefetch_papers if paper['id'].startswith('doi:')]
+            if len(crossref_papers) > 1:
+                # 多篇CrossRef论文通过一次批量请求获取
+                submit_with_script_ctx(prefetch_crossref_details, crossref_papers, executor=get_prefetch_executor())
+                prefetch_papers = [paper for paper in prefetch_papers if not paper['id'].startswith('doi:')]
+            for paper in prefetch_papers:
+                submit_with_script_ctx(
+                    get_paper_details, paper['id'], 'title_zh' not in paper, executor=get_prefetch_executor()
+                )
             
             # 将结果转换为DataFrame以便显示
             df_data = []
@@ -195,9 +423,9 @@ if option == "搜索论文":
                     "ID": paper['id'],
                     "来源": source_label,
                     "标题": paper['title'],
-                    "作者": ', '.join(paper['authors']) if isinstance(paper['authors'], list) else paper['authors'],
+                    "作者": format_list_field(paper['authors']),
                     "发布日期": paper['published'].split()[0] if isinstance(paper['published'], str) else paper['published'],
-                    "分类": ', '.join(paper['categories']) if isinstance(paper['categories'], list) else paper['categories']
+                    "分类": format_list_field(paper['categories'])
                 })
             
             st.session_state.df_data = df_data
@@ -239,201 +467,213 @@ if option == "搜索论文":
         
         st.write(f"找到 {len(df_data)} 篇论文:")
         
-        # 使用表格展示简要信息
+        # 使用表格展示简要信息，点击表格中的行即可查看论文详情
+        import pandas as pd
         df = pd.DataFrame(df_data)
-        st.dataframe(df)
+        event = st.dataframe(df, on_select="rerun", selection_mode="single-row", key="papers_table")
+        if event.selection.rows:
+            st.session_state.selected_paper_id = results[event.selection.rows[0]]['id']
+        else:
+            st.caption("点击表格中的行查看论文详情")
         
-        # 创建选择框 - 不在表单内
-        paper_options = {f"{paper['id']} - {paper['title'][:50]}...": paper['id'] for paper in results}
+        # 选择论文时会自动获取详情，保留按钮用于重新加载详情
+        if st.button("重新加载详情", key="reload_details_button"):
+            # 清除详情缓存，Streamlit重新运行脚本时会重新获取
+            _cached_paper_details.clear()
+
+    # 论文详情面板放在fragment中，面板内的按钮只重新运行该面板而不是整个页面
+    @fragment
+    def render_paper_details(paper):
+        """渲染论文详情、链接、PDF预览和操作按钮"""
+        # 在session_state中存储当前论文详情
+        st.session_state.current_paper = paper
         
-        # 定义选择论文时的回调函数
-        def on_paper_select():
-            # 从选择框的值中获取论文ID
-            selected_option = st.session_state.paper_selector
-            paper_id = paper_options[selected_option]
-            # 更新selected_paper_id
-            st.session_state.selected_paper_id = paper_id
-
-        # 使用on_change参数指定回调函数
-        selected_paper_option = st.selectbox(
-            "选择论文查看详情", 
-            list(paper_options.keys()),
-            key="paper_selector",
-            on_change=on_paper_select  # 当选择变化时调用回调函数
-        )
+        # 作者和分类只用于显示，在渲染时格式化一次，不写入论文数据（论文数据会被保存到论文库）
+        authors_str = format_list_field(paper['authors'])
+        categories_str = format_list_field(paper['categories'])
         
-        # 不再需要查看详情按钮，因为选择论文时会自动获取详情
-        # 但可以保留按钮用于重新加载详情
-        if st.button("重新加载详情", key="reload_details_button"):
-            # 这里不需要做任何事情，因为Streamlit会自动重新运行脚本
-            pass
+        # 使用两列并排显示中英文内容
+        col_en, col_zh = st.columns(2)
+        
+        # 英文原文显示
+        with col_en:
+            st.markdown("### Original")
+            st.markdown(f"**Title:** {paper['title']}")
+            st.markdown(f"**Authors:** {authors_str}")
+            st.markdown(f"**Published:** {paper['published']}")
+            
+            # 元数据 - 英文
+            if 'citation_count' in paper:
+                st.markdown(f"**Citations:** {paper['citation_count']}")
+            if 'influence_factor' in paper:
+                st.markdown(f"**Influence Factor:** {paper['influence_factor']}")
+            if 'published_in' in paper and paper['published_in'] != '未知':
+                st.markdown(f"**Published in:** {paper['published_in']}")
+            
+            # 分类 - 英文
+            st.markdown(f"**Categories:** {categories_str}")
+            
+            # 摘要 - 英文
+            st.markdown("### Abstract")
+            st.markdown(paper['summary'])
+        
+        # 中文翻译显示
+        with col_zh:
+            st.markdown("### 中文翻译")
+            st.markdown(f"**标题:** {safe_get(paper, 'title_zh', paper['title'])}")
+            st.markdown(f"**作者:** {authors_str}")
+            st.markdown(f"**发布日期:** {paper['published']}")
+            
+            # 元数据 - 中文
+            if 'citation_count' in paper:
+                st.markdown(f"**引用次数:** {paper['citation_count']}")
+            if 'influence_factor' in paper:
+                st.markdown(f"**影响因子:** {paper['influence_factor']}")
+            if 'published_in' in paper and paper['published_in'] != '未知':
+                st.markdown(f"**发表于:** {paper['published_in']}")
+            
+            # 分类 - 中文  
+            st.markdown(f"**分类:** {categories_str}")
+            
+            # 摘要 - 中文
+            st.markdown("### 摘要")
+            st.markdown(safe_get(paper, 'summary_zh', paper['summary']))
+        
+        # 主题标签 (如果有)
+        if 'topics' in paper and paper['topics']:
+            st.markdown("### 主题 / Topics")
+            tags = paper['topics']
+            st.write(' '.join([f"<span style='background-color: #E6F6FF; padding: 2px 8px; border-radius: 12px; margin-right: 8px;'>{tag}</span>" for tag in tags]), unsafe_allow_html=True)
+        
+        # 分隔线
+        st.markdown("---")
+        
+        # 添加论文链接区域
+        st.markdown("### 论文链接")
+        link_col1, link_col2, = st.columns(2)
+        
+        with link_col1:
+            # 在线查看PDF按钮
+            pdf_url = None
+            if paper.get('source') == 'crossref':
+                # CrossRef论文的URL
+                pdf_url = paper.get('url')
+            else:
+                # ArXiv论文的PDF URL
+                if paper.get('id'):
+                    arxiv_id = paper.get('id')
+                    # 移除可能的'arxiv:'前缀
+                    if arxiv_id.startswith('arxiv:'):
+                        arxiv_id = arxiv_id[6:]
+                    pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
+            
+            if pdf_url:
+                st.markdown(f"[在线查看PDF]({pdf_url})")
+        
+        with link_col2:
+            # ArXiv页面链接
+            arxiv_url = None
+            if paper.get('id') and not paper.get('id').startswith('doi:'):
+                arxiv_id = paper.get('id')
+                # 移除可能的'arxiv:'前缀
+                if arxiv_id.startswith('arxiv:'):
+                    arxiv_id = arxiv_id[6:]
+                arxiv_url = f"https://arxiv.org/abs/{arxiv_id}"
+                st.markdown(f"[查看ArXiv页面]({arxiv_url})")
+            elif paper.get('arxiv_url'):
+                st.markdown(f"[查看ArXiv页面]({paper.get('arxiv_url')})")
+            elif paper.get('source') == 'crossref' and paper.get('doi'):
+                doi = paper.get('doi')
+                doi_url = f"https://doi.org/{doi}" if not doi.startswith('http') else doi
+                st.markdown(f"[查看DOI页面]({doi_url})")
+        
+        # 添加嵌入式PDF查看器
+        st.markdown("### 预览")
+        
+        # 为PDF创建一个嵌入式框架
+        if pdf_url:
+            # 只有勾选时才嵌入PDF，避免每次重新运行都让浏览器重新加载PDF
+            if st.checkbox("显示PDF预览", value=False, key=f"pdf_preview_{paper['id']}"):
+                # 使用HTML iframe嵌入PDF
+                pdf_display = f"""
+                <iframe src="{pdf_url}" width="100%" height="600" style="border:none;"></iframe>
+                """
+                st.markdown(pdf_display, unsafe_allow_html=True)
+                st.markdown("*如果PDF加载失败，请使用上方链接直接访问*")
+        else:
+            st.info("无法预览PDF，请使用链接在线查看或下载后查看")
+        
+        # 分隔线
+        st.markdown("---")
+        
+        # 添加下载和收藏按钮区域
+        st.markdown("### 操作")
+        action_col1, action_col2 = st.columns(2)
+        
+        with action_col1:
+            # 每次重新运行时根据下载任务的完成情况显示状态
+            download_state = st.session_state.download_states.get(paper['id'])
+            download_message = st.session_state.download_messages.get(paper['id'], "")
+            if is_download_in_progress(paper['id']):
+                # 下载进行中时不允许重复提交
+                st.info(download_message)
+            elif download_state == "success":
+                st.success(download_message)
+            else:
+                # 下载失败或中断后允许重试
+                if download_state is not None:
+                    st.error(download_message or "下载已中断")
+                button_label = "🔄 重新下载" if download_state is not None else "📥 下载此论文"
+                if st.button(button_label, key=f"download_button_{paper['id']}"):
+                    # 初始化下载状态
+                    set_download_state(paper['id'], "initialized", "正在准备下载...")
+                    
+                    # 提交到共享线程池执行下载
+                    st.session_state.download_futures[paper['id']] = submit_with_script_ctx(
+                        download_paper_async, paper['id']
+                    )
+        
+        with action_col2:
+            # 添加收藏按钮
+            if st.button("⭐ 添加到收藏", key=f"favorite_{paper['id']}"):
+                try:
+                    # 分类、论文和收藏关系在一个事务中写入
+                    with paper_manager.batch():
+                        # 确保默认分类存在
+                        if "收藏" not in get_categories():
+                            paper_manager.add_category("收藏")
+                        
+                        # 添加到收藏分类
+                        # 先确保论文已保存
+                        if paper_manager.get_paper(paper['id']) is None:
+                            # 如果论文未保存，先添加到论文列表
+                            local_path = paper.get('local_path', '')
+                            paper_manager.add_paper(paper, local_path)
+                        
+                        # 添加到收藏分类
+                        paper_manager.add_paper_to_category(paper['id'], "收藏")
+                    clear_paper_manager_cache()
+                    st.success("已添加到收藏")
+                except Exception as fav_err:
+                    st.error(f"添加到收藏失败: {str(fav_err)}")
 
     # 显示选定论文详情 - 不在表单内
     if st.session_state.selected_paper_id:
         paper_id = st.session_state.selected_paper_id
+        # 搜索时已批量翻译过的论文直接复用翻译结果
+        search_result = next((p for p in st.session_state.get('search_results', []) if p['id'] == paper_id), None)
+        has_translation = search_result is not None and 'title_zh' in search_result
         with st.spinner("获取论文详情..."):
-            paper = arxiv_client.get_paper_details(paper_id)
+            paper = get_paper_details(paper_id, translate=not has_translation)
+        
+        if "error" not in paper:
+            if has_translation:
+                paper['title_zh'] = search_result['title_zh']
+                paper['summary_zh'] = search_result['summary_zh']
             
-            if "error" not in paper:
-                # 在session_state中存储当前论文详情
-                st.session_state.current_paper = paper
-                
-                # 使用两列并排显示中英文内容
-                col_en, col_zh = st.columns(2)
-                
-                # 英文原文显示
-                with col_en:
-                    st.markdown("### Original")
-                    st.markdown(f"**Title:** {paper['title']}")
-                    st.markdown(f"**Authors:** {', '.join(paper['authors'])}")
-                    st.markdown(f"**Published:** {paper['published']}")
-                    
-                    # 元数据 - 英文
-                    if 'citation_count' in paper:
-                        st.markdown(f"**Citations:** {paper['citation_count']}")
-                    if 'influence_factor' in paper:
-                        st.markdown(f"**Influence Factor:** {paper['influence_factor']}")
-                    if 'published_in' in paper and paper['published_in'] != '未知':
-                        st.markdown(f"**Published in:** {paper['published_in']}")
-                    
-                    # 分类 - 英文
-                    st.markdown(f"**Categories:** {', '.join(paper['categories']) if isinstance(paper['categories'], list) else paper['categories']}")
-                    
-                    # 摘要 - 英文
-                    st.markdown("### Abstract")
-                    st.markdown(paper['summary'])
-                
-                # 中文翻译显示
-                with col_zh:
-                    st.markdown("### 中文翻译")
-                    st.markdown(f"**标题:** {safe_get(paper, 'title_zh', paper['title'])}")
-                    st.markdown(f"**作者:** {', '.join(paper['authors'])}")
-                    st.markdown(f"**发布日期:** {paper['published']}")
-                    
-                    # 元数据 - 中文
-                    if 'citation_count' in paper:
-                        st.markdown(f"**引用次数:** {paper['citation_count']}")
-                    if 'influence_factor' in paper:
-                        st.markdown(f"**影响因子:** {paper['influence_factor']}")
-                    if 'published_in' in paper and paper['published_in'] != '未知':
-                        st.markdown(f"**发表于:** {paper['published_in']}")
-                    
-                    # 分类 - 中文  
-                    st.markdown(f"**分类:** {', '.join(paper['categories']) if isinstance(paper['categories'], list) else paper['categories']}")
-                    
-                    # 摘要 - 中文
-                    st.markdown("### 摘要")
-                    st.markdown(safe_get(paper, 'summary_zh', paper['summary']))
-                
-                # 主题标签 (如果有)
-                if 'topics' in paper and paper['topics']:
-                    st.markdown("### 主题 / Topics")
-                    tags = paper['topics']
-                    st.write(' '.join([f"<span style='background-color: #E6F6FF; padding: 2px 8px; border-radius: 12px; margin-right: 8px;'>{tag}</span>" for tag in tags]), unsafe_allow_html=True)
-                
-                # 分隔线
-                st.markdown("---")
-                
-                # 添加论文链接区域
-                st.markdown("### 论文链接")
-                link_col1, link_col2, = st.columns(2)
-                
-                with link_col1:
-                    # 在线查看PDF按钮
-                    pdf_url = None
-                    if paper.get('source') == 'crossref':
-                        # CrossRef论文的URL
-                        pdf_url = paper.get('url')
-                    else:
-                        # ArXiv论文的PDF URL
-                        if paper.get('id'):
-                            arxiv_id = paper.get('id')
-                            # 移除可能的'arxiv:'前缀
-                            if arxiv_id.startswith('arxiv:'):
-                                arxiv_id = arxiv_id[6:]
-                            pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
-                    
-                    if pdf_url:
-                        st.markdown(f"[在线查看PDF]({pdf_url})")
-                
-                with link_col2:
-                    # ArXiv页面链接
-                    arxiv_url = None
-                    if paper.get('id') and not paper.get('id').startswith('doi:'):
-                        arxiv_id = paper.get('id')
-                        # 移除可能的'arxiv:'前缀
-                        if arxiv_id.startswith('arxiv:'):
-                            arxiv_id = arxiv_id[6:]
-                        arxiv_url = f"https://arxiv.org/abs/{arxiv_id}"
-                        st.markdown(f"[查看ArXiv页面]({arxiv_url})")
-                    elif paper.get('arxiv_url'):
-                        st.markdown(f"[查看ArXiv页面]({paper.get('arxiv_url')})")
-                    elif paper.get('source') == 'crossref' and paper.get('doi'):
-                        doi = paper.get('doi')
-                        doi_url = f"https://doi.org/{doi}" if not doi.startswith('http') else doi
-                        st.markdown(f"[查看DOI页面]({doi_url})")
-                
-                # 添加嵌入式PDF查看器
-                st.markdown("### 预览")
-                
-                # 为PDF创建一个嵌入式框架
-                if pdf_url:
-                    # 使用HTML iframe嵌入PDF
-                    pdf_display = f"""
-                    <iframe src="{pdf_url}" width="100%" height="600" style="border:none;"></iframe>
-                    """
-                    st.markdown(pdf_display, unsafe_allow_html=True)
-                    st.markdown("*如果PDF加载失败，请使用上方链接直接访问*")
-                else:
-                    st.info("无法预览PDF，请使用链接在线查看或下载后查看")
-                
-                # 分隔线
-                st.markdown("---")
-                
-                # 添加下载和收藏按钮区域
-                st.markdown("### 操作")
-                action_col1, action_col2 = st.columns(2)
-                
-                with action_col1:
-                    # 下载按钮实现
-                    if paper['id'] not in st.session_state.download_states:
-                        if st.button("📥 下载此论文", key=f"download_button_{paper['id']}"):
-                            # 初始化下载状态
-                            st.session_state.download_states[paper['id']] = "initialized"
-                            st.session_state.download_messages[paper['id']] = "正在准备下载..."
-                            
-                            # 创建并启动下载线程
-                            download_thread = threading.Thread(
-                                target=download_paper_async,
-                                args=(paper['id'],)
-                            )
-                            # 添加脚本运行上下文以允许线程内更新session_state
-                            ctx = get_script_run_ctx()
-                            add_script_run_ctx(download_thread)
-                            download_thread.start()
-                
-                with action_col2:
-                    # 添加收藏按钮
-                    if st.button("⭐ 添加到收藏", key=f"favorite_{paper['id']}"):
-                        try:
-                            # 确保默认分类存在
-                            if "收藏" not in paper_manager.get_categories():
-                                paper_manager.add_category("收藏")
-                            
-                            # 添加到收藏分类
-                            # 先确保论文已保存
-                            if paper_manager.get_paper(paper['id']) is None:
-                                # 如果论文未保存，先添加到论文列表
-                                local_path = paper.get('local_path', '')
-                                paper_manager.add_paper(paper, local_path)
-                            
-                            # 添加到收藏分类
-                            paper_manager.add_paper_to_category(paper['id'], "收藏")
-                            st.success("已添加到收藏")
-                        except Exception as fav_err:
-                            st.error(f"添加到收藏失败: {str(fav_err)}")
-            else:
-                st.error(paper["error"])
+            render_paper_details(paper)
+        else:
+            st.error(paper["error"])
 
 elif option == "下载论文":
     st.header("批量下载论文")
@@ -454,16 +694,19 @@ elif option == "下载论文":
                 downloaded_papers = []
                 failed_papers = []
                 
-                for i, paper_id in enumerate(ids):
-                    status_text.text(f"下载中 ({i+1}/{len(ids)}): {paper_id}")
-                    try:
-                        output_path = arxiv_client.download(paper_id)
+                # 批量下载使用独立的线程池，避免占满共享线程池而阻塞单篇下载
+                # 所有下载任务同时开始，按完成顺序更新进度
+                status_text.text(f"下载中 (0/{len(ids)})")
+                for i, (paper_id, output_path) in enumerate(arxiv_client.download_many(ids, max_workers=min(8, len(ids))), 1):
+                    # download出错时返回错误字典而不是抛出异常
+                    if isinstance(output_path, dict) and "error" in output_path:
+                        failed_papers.append((paper_id, output_path['error']))
+                    else:
                         downloaded_papers.append((paper_id, output_path))
-                    except Exception as e:
-                        failed_papers.append((paper_id, str(e)))
                     
                     # 更新进度条
-                    progress_bar.progress((i + 1) / len(ids))
+                    status_text.text(f"下载中 ({i}/{len(ids)}): {paper_id} 已完成")
+                    progress_bar.progress(i / len(ids))
                 
                 # 显示结果
                 if downloaded_papers:
@@ -477,37 +720,30 @@ elif option == "下载论文":
                         st.write(f"- {paper_id}: {error}")
                         
 elif option == "整理论文":
+    import pandas as pd
+    
     st.header("整理下载的论文")
     
     # 获取所有已下载的论文
-    papers = paper_manager.get_all_papers()  # 使用新添加的方法
-    if papers:
+    papers_version = paper_manager.get_version()
+    df = get_papers_dataframe(papers_version)
+    if not df.empty:
         st.subheader("已下载的论文")
-        
-        # 转换为适合显示的格式
-        paper_data = []
-        for paper in papers:
-            paper_data.append({
-                "ID": paper.get('id', ''),
-                "标题": paper.get('title', ''),
-                "作者": ', '.join(paper.get('authors', [])) if isinstance(paper.get('authors'), list) else paper.get('authors', ''),
-                "下载日期": paper.get('download_date', ''),
-                "本地路径": paper.get('local_path', '')
-            })
-        
-        df = pd.DataFrame(paper_data)
         st.dataframe(df)
         
         # 添加搜索功能
         search_term = st.text_input("搜索已下载的论文", "")
         if search_term:
-            filtered_papers = [p for p in paper_data if 
-                               search_term.lower() in p['标题'].lower() or 
-                               search_term.lower() in p['作者'].lower() or
-                               search_term.lower() in p['ID'].lower()]
-            if filtered_papers:
-                st.write(f"找到 {len(filtered_papers)} 个匹配结果:")
-                st.dataframe(pd.DataFrame(filtered_papers))
+            # 使用pandas的向量化字符串匹配过滤
+            mask = (
+                df['标题'].str.contains(search_term, case=False, na=False, regex=False) |
+                df['作者'].str.contains(search_term, case=False, na=False, regex=False) |
+                df['ID'].str.contains(search_term, case=False, na=False, regex=False)
+            )
+            filtered_df = df[mask]
+            if not filtered_df.empty:
+                st.write(f"找到 {len(filtered_df)} 个匹配结果:")
+                st.dataframe(filtered_df)
             else:
                 st.info("未找到匹配的论文")
         
@@ -515,7 +751,7 @@ elif option == "整理论文":
         st.subheader("论文分类管理")
         
         # 显示现有分类
-        categories = paper_manager.get_categories()
+        categories = get_categories()
         if categories:
             st.write("现有分类:")
             for category in categories:
@@ -525,12 +761,13 @@ elif option == "整理论文":
         new_category = st.text_input("新建分类")
         if st.button("添加分类") and new_category:
             paper_manager.add_category(new_category)
+            clear_paper_manager_cache()
             st.success(f"已添加分类: {new_category}")
-            st.experimental_rerun()
+            st.rerun()
         
         # 为论文添加分类
         st.subheader("为论文添加分类")
-        paper_options = {f"{p['ID']} - {p['标题'][:50]}...": p['ID'] for p in paper_data}
+        paper_options = get_paper_options(papers_version)
         selected_paper = st.selectbox("选择论文", list(paper_options.keys()))
         selected_paper_id = paper_options[selected_paper] if selected_paper else None
         
@@ -557,7 +794,7 @@ elif option == "整理论文":
                             cat_paper_data.append({
                                 "ID": paper.get('id', ''),
                                 "标题": paper.get('title', ''),
-                                "作者": ', '.join(paper.get('authors', [])),
+                                "作者": format_list_field(paper.get('authors', [])),
                                 "下载日期": paper.get('download_date', '')
                             })
                     
@@ -1,21 +1,55 @@
 import arxiv
 import os
+import logging
 import datetime
-import requests
 import json
+import itertools
+import tempfile
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from metadata_enricher import MetadataEnricher
+from json_utils import loads as json_loads
+from http_utils import create_session
+from disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# ArXiv论文元数据在磁盘缓存中的有效期（秒）
+ARXIV_META_CACHE_TTL = 24 * 60 * 60
 
 class ArxivClient:
     """
     与ArXiv API交互的客户端
     """
     
-    def __init__(self):
+    def __init__(self, crossref_mailto=None):
         """
         初始化ArXiv客户端
+        
+        参数:
+            crossref_mailto (str): 提供给CrossRef的联系邮箱，未指定时读取环境变量CROSSREF_MAILTO。
+                提供邮箱的请求会进入CrossRef的"polite pool"，响应更快更稳定
         """
         self.client = arxiv.Client()
         self.metadata_enricher = MetadataEnricher()
+        
+        # 按照CrossRef的礼仪要求在User-Agent和查询参数中提供联系邮箱
+        mailto = crossref_mailto or os.environ.get("CROSSREF_MAILTO")
+        if mailto:
+            user_agent = f'ArxivReviewApp/1.0 (mailto:{mailto})'
+            self._crossref_params = {'mailto': mailto}
+        else:
+            user_agent = 'ArxivReviewApp/1.0'
+            self._crossref_params = {}
+        
+        # 复用连接的HTTP会话，CrossRef请求和批量下载PDF时避免每次重新建立TCP/TLS连接
+        self.session = create_session(pool_connections=8, pool_maxsize=16, headers={'User-Agent': user_agent})
+        
+        # 用于并发请求ArXiv、CrossRef和Semantic Scholar的线程池
+        self._executor = ThreadPoolExecutor(max_workers=4)
+        
+        # 按论文ID缓存ArXiv元数据，磁盘缓存按ARXIV_META_CACHE_TTL过期，读取一条记录的开销很小，不再另设内存缓存
+        self.arxiv_meta_cache = DiskCache("arxiv_meta")
     
     def search(self, query, max_results=10, sort_by="relevance", use_backup=True):
         """
@@ -30,8 +64,43 @@ class ArxivClient:
         返回:
             list: 论文信息列表
         """
-        print(f"使用ArXiv搜索: {query}")
+        logger.info("使用ArXiv搜索: %s", query)
+        
+        results = list(itertools.islice(self.iter_search(query, max_results, sort_by), max_results))
+        
+        logger.info("ArXiv搜索结果数量: %s", len(results))
         
+        # 如果结果很少，使用备用源；只在确实需要时才请求CrossRef，
+        # 不会为每次搜索都多发一个请求，也不会留下未完成的后台请求拖住进程退出
+        if use_backup and len(results) < 3:
+            logger.info("ArXiv结果较少，尝试使用备用源")
+            backup_results = self.search_with_crossref(query, max_results=max_results)
+            
+            # 将备用源结果添加到主结果中
+            if backup_results:
+                # 确保没有重复
+                existing_ids = {r['id'] for r in results}
+                for br in backup_results:
+                    if br['id'] not in existing_ids:
+                        results.append(br)
+                        existing_ids.add(br['id'])
+                
+                logger.info("添加备用源后总结果数量: %s", len(results))
+        
+        return results
+    
+    def iter_search(self, query, max_results=10, sort_by="relevance"):
+        """
+        在ArXiv上搜索论文，逐篇产生结果，调用方可以在后续结果返回前开始处理已有的论文
+        
+        参数:
+            query (str): 搜索查询
+            max_results (int): 返回的最大结果数
+            sort_by (str): 排序方式，可选值: relevance, lastUpdatedDate, submittedDate
+            
+        返回:
+            generator: 论文信息
+        """
         # 创建搜索对象
         sort_options = {
             "relevance": arxiv.SortCriterion.Relevance,
@@ -47,11 +116,10 @@ class ArxivClient:
             sort_by=sort_criterion
         )
         
-        # 获取搜索结果
-        results = []
+        # 逐篇获取搜索结果
         try:
             for result in self.client.results(search):
-                paper = {
+                yield {
                     'id': result.get_short_id(),
                     'title': result.title,
                     'authors': [author.name for author in result.authors],
@@ -63,29 +131,8 @@ class ArxivClient:
                     'arxiv_url': result.entry_id,
                     'source': 'arxiv'  # 标记来源
                 }
-                results.append(paper)
         except Exception as e:
-            print(f"ArXiv搜索出错: {str(e)}")
-        
-        print(f"ArXiv搜索结果数量: {len(results)}")
-        
-        # 如果结果很少，尝试使用备用源
-        if use_backup and len(results) < 3:
-            print(f"ArXiv结果较少，尝试使用备用源")
-            backup_results = self.search_with_crossref(query, max_results=max_results)
-            
-            # 将备用源结果添加到主结果中
-            if backup_results:
-                # 确保没有重复
-                existing_ids = {r['id'] for r in results}
-                for br in backup_results:
-                    if br['id'] not in existing_ids:
-                        results.append(br)
-                        existing_ids.add(br['id'])
-                
-                print(f"添加备用源后总结果数量: {len(results)}")
-        
-        return results
+            logger.warning("ArXiv搜索出错: %s", e)
     
     def search_with_crossref(self, query, max_results=10):
         """
@@ -98,7 +145,7 @@ class ArxivClient:
         返回:
             list: 论文信息列表
         """
-        print(f"使用CrossRef搜索: {query}")
+        logger.info("使用CrossRef搜索: %s", query)
         
         # 构建API URL
         url = f"https://api.crossref.org/works"
@@ -108,162 +155,92 @@ class ArxivClient:
             'sort': 'relevance',
             'order': 'desc',
             'filter': 'type:journal-article',
-        }
-        
-        # 添加Email以符合CrossRef的礼仪要求
-        headers = {
-            'User-Agent': 'ArxivReviewApp/1.0 (mailto:contact@example.com)'
+            **self._crossref_params,
         }
         
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             
             if response.status_code != 200:
-                print(f"CrossRef API请求失败: {response.status_code}")
+                logger.warning("CrossRef API请求失败: %s", response.status_code)
                 return []
             
-            data = response.json()
+            data = json_loads(response.content)
             
             if 'message' not in data or 'items' not in data['message']:
-                print("CrossRef返回格式异常")
+                logger.warning("CrossRef返回格式异常")
                 return []
             
             items = data['message']['items']
-            print(f"CrossRef搜索结果数量: {len(items)}")
+            logger.info("CrossRef搜索结果数量: %s", len(items))
             
             results = []
             for item in items:
-                # 提取基本信息
-                paper_id = item.get('DOI', '').replace('/', '_')
-                
-                # 确保有标题
-                if 'title' not in item or not item['title']:
-                    continue
-                
-                # 提取作者
-                authors = []
-                if 'author' in item:
-                    for author in item['author']:
-                        name_parts = []
-                        if 'given' in author:
-                            name_parts.append(author['given'])
-                        if 'family' in author:
-                            name_parts.append(author['family'])
-                        if name_parts:
-                            authors.append(' '.join(name_parts))
-                
-                # 发布日期
-                published = ''
-                if 'published' in item and item['published'] and 'date-parts' in item['published']:
-                    date_parts = item['published']['date-parts'][0]
-                    if len(date_parts) >= 3:
-                        published = f"{date_parts[0]}-{date_parts[1]:02d}-{date_parts[2]:02d}"
-                    elif len(date_parts) >= 1:
-                        published = str(date_parts[0])
-                
-                # 摘要
-                summary = item.get('abstract', '')
-                if not summary:
-                    summary = item.get('subtitle', [''])[0] if 'subtitle' in item and item['subtitle'] else ''
-                
-                # URL
-                url = ''
-                if 'URL' in item:
-                    url = item['URL']
-                elif 'link' in item and item['link']:
-                    for link in item['link']:
-                        if 'URL' in link:
-                            url = link['URL']
-                            break
-                
-                paper = {
-                    'id': f"doi:{paper_id}",
-                    'title': item['title'][0] if isinstance(item['title'], list) else item['title'],
-                    'authors': authors,
-                    'summary': summary,
-                    'published': published,
-                    'updated': published,
-                    'categories': item.get('subject', []),
-                    'pdf_url': url,
-                    'arxiv_url': url,
-                    'doi': item.get('DOI', ''),
-                    'source': 'crossref'  # 标记来源
-                }
-                
-                results.append(paper)
+                # 没有标题的记录会被跳过
+                paper = self._parse_crossref_item(item)
+                if paper:
+                    results.append(paper)
             
             return results
         
         except Exception as e:
-            print(f"CrossRef搜索出错: {str(e)}")
+            logger.warning("CrossRef搜索出错: %s", e)
             return []
     
-    def get_paper_details(self, paper_id):
+    def get_paper_details(self, paper_id, translate=True, crossref_item=None):
         """
         获取论文的详细信息，包括增强的元数据
         
         参数:
             paper_id (str): 论文ID
+            translate (bool): 是否翻译标题和摘要，调用方已有翻译结果时可跳过
+            crossref_item (dict): 已通过get_crossref_items批量获取的CrossRef记录，只用于CrossRef来源的论文
             
         返回:
             dict: 论文详情
         """
         # 处理CrossRef来源的论文
         if paper_id.startswith('doi:'):
-            return self.get_crossref_paper_details(paper_id)
+            return self.get_crossref_paper_details(paper_id, translate=translate, item=crossref_item)
         
         # 处理论文ID格式
         # 移除可能存在的"arxiv:"前缀
         if paper_id.startswith('arxiv:'):
             paper_id = paper_id[6:]
         
+        # 增强元数据不依赖ArXiv的返回结果，与获取基本信息和翻译同时进行
+        # 注意这里传递的是没有前缀的ID
+        enrich_future = self._executor.submit(self.metadata_enricher.enrich_with_semantic_scholar, paper_id)
+        
         try:
-            # 创建搜索对象，注意这里不添加前缀
-            search = arxiv.Search(id_list=[paper_id])
-            
-            # 获取基本信息
-            paper = next(self.client.results(search))
-            
-            # 基本信息
-            paper_data = {
-                'id': paper.get_short_id(),
-                'title': paper.title,
-                'authors': [author.name for author in paper.authors],
-                'summary': paper.summary,
-                'published': str(paper.published),
-                'updated': str(paper.updated),
-                'categories': paper.categories,
-                'pdf_url': paper.pdf_url,
-                'arxiv_url': paper.entry_id,
-                'comment': getattr(paper, 'comment', ''),
-                'journal_ref': getattr(paper, 'journal_ref', ''),
-                'source': 'arxiv'
-            }
+            # 基本信息（缓存的元数据是共享的，复制后再添加字段）
+            paper_data = dict(self._fetch_arxiv_meta(paper_id))
+            paper_data['source'] = 'arxiv'
             
             # 先翻译基本信息
-            try:
-                print("正在翻译标题...")
-                translated_title = self.metadata_enricher.translate_text(paper_data['title'])
-                paper_data['title_zh'] = translated_title
-                
-                print("正在翻译摘要...")
-                # 使用分块翻译功能处理长摘要
-                translated_summary = self.metadata_enricher.translate_text(paper_data['summary'])
-                paper_data['summary_zh'] = translated_summary
-                
-            except Exception as e:
-                print(f"翻译失败: {str(e)}")
-                paper_data['title_zh'] = paper_data['title']
-                paper_data['summary_zh'] = paper_data['summary']
+            if translate:
+                try:
+                    logger.debug("正在翻译标题...")
+                    translated_title = self.metadata_enricher.translate_text(paper_data['title'])
+                    paper_data['title_zh'] = translated_title
+                    
+                    logger.debug("正在翻译摘要...")
+                    # 使用分块翻译功能处理长摘要
+                    translated_summary = self.metadata_enricher.translate_text(paper_data['summary'])
+                    paper_data['summary_zh'] = translated_summary
+                    
+                except Exception as e:
+                    logger.warning("翻译失败: %s", e)
+                    paper_data['title_zh'] = paper_data['title']
+                    paper_data['summary_zh'] = paper_data['summary']
             
             # 尝试获取增强元数据，但不影响基本功能
             try:
-                # 注意这里传递的是没有前缀的ID
-                additional_data = self.metadata_enricher.enrich_with_semantic_scholar(paper_id)
+                additional_data = enrich_future.result()
                 if additional_data:  # 只有当返回有效数据时才更新
                     paper_data.update(additional_data)
             except Exception as e:
-                print(f"增强元数据获取失败: {str(e)}")
+                logger.warning("增强元数据获取失败: %s", e)
             
             return paper_data
             
@@ -272,111 +249,239 @@ class ArxivClient:
         except Exception as e:
             return {"error": f"获取论文详情出错: {str(e)}"}
     
-    def get_crossref_paper_details(self, paper_id):
+    def _fetch_arxiv_meta(self, paper_id):
+        """
+        获取ArXiv论文的基本元数据，优先使用磁盘缓存
+        
+        参数:
+            paper_id (str): 不带"arxiv:"前缀的论文ID
+            
+        返回:
+            dict: 可JSON序列化的论文元数据，调用方不应修改
+            
+        异常:
+            StopIteration: 未找到该论文
+        """
+        cached = self.arxiv_meta_cache.get(paper_id)
+        if cached is not None:
+            return cached
+        
+        # 创建搜索对象，注意这里不添加前缀
+        search = arxiv.Search(id_list=[paper_id])
+        paper = next(self.client.results(search))
+        
+        meta = {
+            'id': paper.get_short_id(),
+            'title': paper.title,
+            'authors': [author.name for author in paper.authors],
+            'summary': paper.summary,
+            'published': str(paper.published),
+            'updated': str(paper.updated),
+            'categories': paper.categories,
+            'pdf_url': paper.pdf_url,
+            'arxiv_url': paper.entry_id,
+            'comment': getattr(paper, 'comment', ''),
+            'journal_ref': getattr(paper, 'journal_ref', '')
+        }
+        self.arxiv_meta_cache.set(paper_id, meta, expire=ARXIV_META_CACHE_TTL)
+        return meta
+    
+    def get_crossref_paper_details(self, paper_id, translate=True, item=None):
         """
         获取CrossRef来源论文的详细信息
         
         参数:
             paper_id (str): 论文ID (格式: doi:xxx)
+            translate (bool): 是否翻译标题和摘要
+            item (dict): 已获取的CrossRef记录，为None时请求CrossRef API
             
         返回:
             dict: 论文详情
         """
         try:
-            # 提取DOI
-            doi = paper_id[4:].replace('_', '/')
+            if item is None:
+                # 提取DOI
+                doi = paper_id[4:].replace('_', '/')
+                
+                # 请求CrossRef API
+                url = f"https://api.crossref.org/works/{doi}"
+                response = self.session.get(url, params=self._crossref_params, timeout=10)
+                
+                if response.status_code != 200:
+                    return {"error": f"CrossRef API请求失败: {response.status_code}"}
+                
+                data = json_loads(response.content)
+                
+                if 'message' not in data:
+                    return {"error": "CrossRef返回格式异常"}
+                
+                item = data['message']
             
-            # 请求CrossRef API
-            url = f"https://api.crossref.org/works/{doi}"
-            headers = {
-                'User-Agent': 'ArxivReviewApp/1.0 (mailto:contact@example.com)'
-            }
+            return self._build_crossref_paper_details(paper_id, item, translate)
             
-            response = requests.get(url, headers=headers, timeout=10)
+        except Exception as e:
+            return {"error": f"获取CrossRef论文详情出错: {str(e)}"}
+    
+    def get_crossref_items(self, dois):
+        """
+        批量获取CrossRef记录，之后可传给get_paper_details，无需再逐篇请求
+        
+        参数:
+            dois (list): DOI列表
             
-            if response.status_code != 200:
-                return {"error": f"CrossRef API请求失败: {response.status_code}"}
-            
-            data = response.json()
-            
-            if 'message' not in data:
-                return {"error": "CrossRef返回格式异常"}
-            
-            item = data['message']
-            
-            # 提取作者
-            authors = []
-            if 'author' in item:
-                for author in item['author']:
-                    name_parts = []
-                    if 'given' in author:
-                        name_parts.append(author['given'])
-                    if 'family' in author:
-                        name_parts.append(author['family'])
-                    if name_parts:
-                        authors.append(' '.join(name_parts))
-            
-            # 发布日期
-            published = ''
-            if 'published' in item and item['published'] and 'date-parts' in item['published']:
-                date_parts = item['published']['date-parts'][0]
-                if len(date_parts) >= 3:
-                    published = f"{date_parts[0]}-{date_parts[1]:02d}-{date_parts[2]:02d}"
-                elif len(date_parts) >= 1:
-                    published = str(date_parts[0])
-            
-            # 摘要
-            summary = item.get('abstract', '')
-            if not summary:
-                summary = item.get('subtitle', [''])[0] if 'subtitle' in item and item['subtitle'] else ''
-            
-            # URL
-            url = ''
-            if 'URL' in item:
-                url = item['URL']
-            elif 'link' in item and item['link']:
-                for link in item['link']:
-                    if 'URL' in link:
-                        url = link['URL']
-                        break
-            
-            paper_data = {
-                'id': paper_id,
-                'title': item.get('title', ['Untitled'])[0] if isinstance(item.get('title'), list) else item.get('title', 'Untitled'),
-                'authors': authors,
-                'summary': summary,
-                'published': published,
-                'updated': published,
-                'categories': item.get('subject', []),
-                'pdf_url': url,
-                'arxiv_url': url,
-                'doi': item.get('DOI', ''),
-                'source': 'crossref'
+        返回:
+            dict: DOI（小写）到CrossRef记录的映射，请求出错时返回空字典
+        """
+        try:
+            return self._fetch_crossref_items(dois)
+        except Exception as e:
+            logger.warning("批量获取CrossRef记录出错: %s", e)
+            return {}
+    
+    def _fetch_crossref_items(self, dois):
+        """
+        使用filter=doi:查询批量请求CrossRef记录，URL过长时拆分为多个请求
+        
+        参数:
+            dois (list): DOI列表
+            
+        返回:
+            dict: DOI（小写）到CrossRef记录的映射
+        """
+        # 按编码后的查询参数长度拆分批次，避免URL过长被拒绝
+        batches = []
+        batch = []
+        for doi in dict.fromkeys(dois):
+            if batch and len(urlencode({'filter': ','.join(f"doi:{d}" for d in batch + [doi])})) > 3500:
+                batches.append(batch)
+                batch = []
+            batch.append(doi)
+        if batch:
+            batches.append(batch)
+        
+        items = {}
+        for batch in batches:
+            params = {
+                'filter': ','.join(f"doi:{d}" for d in batch),
+                'rows': len(batch),
+                **self._crossref_params,
             }
+            response = self.session.get("https://api.crossref.org/works", params=params, timeout=10)
+            
+            if response.status_code != 200:
+                raise RuntimeError(f"CrossRef API请求失败: {response.status_code}")
+            
+            data = json_loads(response.content)
+            for item in data.get('message', {}).get('items', []):
+                if item.get('DOI'):
+                    items[item['DOI'].lower()] = item
+        
+        return items
+    
+    def _build_crossref_paper_details(self, paper_id, item, translate=True):
+        """
+        根据CrossRef记录构建论文详情
+        
+        参数:
+            paper_id (str): 论文ID (格式: doi:xxx)
+            item (dict): CrossRef返回的论文记录
+            translate (bool): 是否翻译标题和摘要
             
-            # 翻译标题和摘要
+        返回:
+            dict: 论文详情
+        """
+        paper_data = self._parse_crossref_item(item, default_title='Untitled')
+        paper_data['id'] = paper_id
+        summary = paper_data['summary']
+        
+        # 翻译标题和摘要
+        if translate:
             try:
-                print("正在翻译CrossRef论文标题...")
+                logger.debug("正在翻译CrossRef论文标题...")
                 translated_title = self.metadata_enricher.translate_text(paper_data['title'])
                 paper_data['title_zh'] = translated_title
                 
                 if summary:
-                    print("正在翻译CrossRef论文摘要...")
+                    logger.debug("正在翻译CrossRef论文摘要...")
                     translated_summary = self.metadata_enricher.translate_text(summary)
                     paper_data['summary_zh'] = translated_summary
                 else:
                     paper_data['summary_zh'] = "无摘要"
                 
             except Exception as e:
-                print(f"翻译失败: {str(e)}")
+                logger.warning("翻译失败: %s", e)
                 paper_data['title_zh'] = paper_data['title']
                 paper_data['summary_zh'] = paper_data['summary'] if paper_data['summary'] else "无摘要"
+        
+        return paper_data
             
-            return paper_data
-            
-        except Exception as e:
-            return {"error": f"获取CrossRef论文详情出错: {str(e)}"}
+    @staticmethod
+    def _parse_crossref_item(item, default_title=None):
+        """
+        将CrossRef返回的记录解析为论文信息
+        
+        参数:
+            item (dict): CrossRef返回的论文记录
+            default_title (str): 记录没有标题时使用的标题，为None时跳过没有标题的记录
             
+        返回:
+            dict: 论文信息，记录没有标题且未指定default_title时返回None
+        """
+        # 确保有标题
+        title = item.get('title')
+        if isinstance(title, list):
+            title = title[0] if title else None
+        if not title:
+            if default_title is None:
+                return None
+            title = default_title
+        
+        # 提取作者
+        authors = []
+        for author in item.get('author', []):
+            name = ' '.join(filter(None, (author.get('given'), author.get('family'))))
+            if name:
+                authors.append(name)
+        
+        # 发布日期
+        published = ''
+        if 'published' in item and item['published'] and 'date-parts' in item['published']:
+            date_parts = item['published']['date-parts'][0]
+            if len(date_parts) >= 3:
+                published = f"{date_parts[0]}-{date_parts[1]:02d}-{date_parts[2]:02d}"
+            elif len(date_parts) >= 1:
+                published = str(date_parts[0])
+        
+        # 摘要
+        summary = item.get('abstract', '')
+        if not summary:
+            summary = item['subtitle'][0] if item.get('subtitle') else ''
+        
+        # URL
+        url = ''
+        if 'URL' in item:
+            url = item['URL']
+        elif 'link' in item and item['link']:
+            for link in item['link']:
+                if 'URL' in link:
+                    url = link['URL']
+                    break
+        
+        doi = item.get('DOI', '')
+        return {
+            'id': f"doi:{doi.replace('/', '_')}",
+            'title': title,
+            'authors': authors,
+            'summary': summary,
+            'published': published,
+            'updated': published,
+            'categories': item.get('subject', []),
+            'pdf_url': url,
+            'arxiv_url': url,
+            'doi': doi,
+            'source': 'crossref'  # 标记来源
+        }
+    
     def download(self, paper_id):
         """
         下载论文PDF
@@ -393,40 +498,79 @@ class ArxivClient:
         
         # 确保下载目录存在
         download_dir = os.path.join(os.getcwd(), "downloads")
-        if not os.path.exists(download_dir):
-            os.makedirs(download_dir)
+        os.makedirs(download_dir, exist_ok=True)
         
         # 检查是否已经下载过
         existing_path = os.path.join(download_dir, f"{paper_id}.pdf")
         if os.path.exists(existing_path):
-            print(f"论文已下载: {existing_path}")
+            logger.info("论文已下载: %s", existing_path)
             return existing_path
         
         try:
-            # 创建搜索对象
-            search = arxiv.Search(id_list=[paper_id])
-            
-            # 获取论文并下载
-            paper = next(self.client.results(search))
+            # 获取论文的PDF链接
+            pdf_url = self._fetch_arxiv_meta(paper_id)['pdf_url']
             
-            # 设置下载选项
-            paper.download_pdf(dirpath=download_dir, filename=f"{paper_id}.pdf")
-            
-            # 返回保存的路径
+            # 流式下载到临时文件，完成后再重命名，避免中断时留下不完整的PDF；
+            # 每次下载使用各自的临时文件，同一篇论文被同时下载时不会互相覆盖
             downloaded_path = os.path.join(download_dir, f"{paper_id}.pdf")
+            fd, temp_path = tempfile.mkstemp(dir=download_dir, prefix=f"{paper_id}.", suffix=".part")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    with self.session.get(pdf_url, stream=True, timeout=30) as response:
+                        response.raise_for_status()
+                        for chunk in response.iter_content(chunk_size=1 << 16):
+                            f.write(chunk)
+                # mkstemp创建的文件只有所有者可读写，改为与普通文件相同的权限
+                os.chmod(temp_path, 0o644)
+                os.replace(temp_path, downloaded_path)
+            except BaseException:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+            
+            # 验证文件确实已下载（一次stat同时检查文件是否存在及其大小）
+            try:
+                downloaded = os.stat(downloaded_path).st_size > 0
+            except FileNotFoundError:
+                downloaded = False
             
-            # 验证文件确实已下载
-            if os.path.exists(downloaded_path) and os.path.getsize(downloaded_path) > 0:
-                print(f"论文下载成功: {downloaded_path}")
+            if downloaded:
+                logger.info("论文下载成功: %s", downloaded_path)
                 return downloaded_path
             else:
                 return {"error": "下载完成但文件不存在或为空"}
             
         except StopIteration:
             error_msg = f"未找到ID为{paper_id}的论文"
-            print(error_msg)
+            logger.warning(error_msg)
             return {"error": error_msg}
         except Exception as e:
             error_msg = f"下载论文时出错: {str(e)}"
-            print(error_msg)
-            return {"error": error_msg} 
\ No newline at end of file
+            logger.warning(error_msg)
+            return {"error": error_msg}
+    
+    def download_many(self, paper_ids, max_workers=4):
+        """
+        并发下载多篇论文PDF
+        
+        参数:
+            paper_ids (list): 论文ID列表
+            max_workers (int): 同时下载的论文数量上限
+            
+        返回:
+            generator: 按下载完成顺序产生(论文ID, 下载结果)，下载结果与download的返回值相同
+        """
+        # 使用独立的线程池，避免批量下载占满用于请求元数据的线程池
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.download, paper_id): paper_id for paper_id in paper_ids}
+            for future in as_completed(futures):
+                paper_id = futures[future]
+                # 单篇论文出错不影响其他论文的结果
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning("下载论文 %s 时出错: %s", paper_id, e)
+                    result = {"error": f"下载论文时出错: {str(e)}"}
+                yield paper_id, result
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 默认的缓存数据库位置
+DEFAULT_CACHE_PATH = os.path.join(".cache", "cache.db")
+
+# 每个命名空间默认最多保留的条目数，超出时清除最早写入的条目
+DEFAULT_MAX_ENTRIES = 10000
+
+# 每写入多少次清理一次过期和超出数量上限的条目
+PRUNE_EVERY_WRITES = 1000
+
+class DiskCache:
+    """
+    基于SQLite的持久化键值缓存，值以JSON格式保存
+    """
+
+    def __init__(self, namespace, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        初始化磁盘缓存
+
+        参数:
+            namespace (str): 缓存命名空间，不同用途的缓存互不干扰
+            path (str): SQLite数据库文件路径
+            max_entries (int): 命名空间中最多保留的条目数
+        """
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self._writes = 0
+
+        # 确保缓存目录存在
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 连接可能被Streamlit的多个会话线程共享，用锁串行化访问
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "value TEXT NOT NULL, "
+                "expires_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+
+        # 启动时清理一次，之后每写入PRUNE_EVERY_WRITES次再清理
+        self.prune()
+
+    def get(self, key, default=None):
+        """
+        读取缓存值
+
+        参数:
+            key (str): 缓存键
+            default: 未命中或已过期时返回的值
+
+        返回:
+            缓存的值，未命中时返回default
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("读取缓存出错: %s", e)
+            return default
+
+        if row is None:
+            return default
+
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return default
+
+        return json.loads(value)
+
+    def set(self, key, value, expire=None):
+        """
+        写入缓存值
+
+        参数:
+            key (str): 缓存键
+            value: 可JSON序列化的值
+            expire (float): 有效期（秒），为None时永不过期
+
+        返回:
+            bool: 是否写入成功
+        """
+        expires_at = time.time() + expire if expire is not None else None
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, json.dumps(value, ensure_ascii=False), expires_at)
+                )
+                self._writes += 1
+                prune = self._writes % PRUNE_EVERY_WRITES == 0
+        except sqlite3.Error as e:
+            logger.warning("写入缓存出错: %s", e)
+            return False
+
+        if prune:
+            self.prune()
+        return True
+
+    def delete(self, key):
+        """
+        删除缓存值
+
+        参数:
+            key (str): 缓存键
+        """
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except sqlite3.Error as e:
+            logger.warning("删除缓存出错: %s", e)
+
+    def prune(self):
+        """
+        清理命名空间中已过期的条目，并在条目数超过max_entries时清除最早写入的条目
+        （如PDF被替换后按旧修改时间生成的键再也不会被读取，只能按数量清除）
+
+        返回:
+            int: 清除的条目数
+        """
+        try:
+            with self._lock, self._conn:
+                expired = self._conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at < ?",
+                    (self.namespace, time.time())
+                ).rowcount
+                # 覆盖写入时行会被删除后重新插入，rowid越小说明写入得越早
+                overflow = self._conn.execute(
+                    "DELETE FROM cache WHERE rowid IN ("
+                    "SELECT rowid FROM cache WHERE namespace = ? ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                    (self.namespace, self.max_entries)
+                ).rowcount
+        except sqlite3.Error as e:
+            logger.warning("清理缓存出错: %s", e)
+            return 0
+
+        if expired or overflow:
+            logger.debug("已清理缓存%s中的%d个过期条目和%d个超出数量上限的条目", self.namespace, expired, overflow)
+        return expired + overflow
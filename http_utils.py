@@ -0,0 +1,80 @@
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+def create_session(pool_connections=4, pool_maxsize=8, headers=None):
+    """
+    创建复用连接的HTTP会话，对限流和服务端错误自动重试
+
+    参数:
+        pool_connections (int): 缓存的连接池数量（每个主机一个连接池）
+        pool_maxsize (int): 每个连接池中保留的最大连接数
+        headers (dict): 会话中所有请求默认携带的请求头
+
+    返回:
+        requests.Session: HTTP会话
+    """
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+
+    # 重试次数用尽后返回最后一次的响应而不是抛出异常，由调用方检查状态码
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class TokenBucket:
+    """
+    令牌桶限流器，只在请求频率超过限制时才等待
+    """
+
+    def __init__(self, rate=5, per=1.0):
+        """
+        初始化令牌桶
+
+        参数:
+            rate (float): 每个时间窗口内允许的请求数
+            per (float): 时间窗口长度（秒）
+        """
+        self.rate = rate
+        self.per = per
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._slow_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """获取一个令牌，令牌不足时等待到有可用令牌为止"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # 被限流后的一段时间内速率减半
+                rate = self.rate / 2 if now < self._slow_until else self.rate
+                # 桶容量至少为1个令牌，否则速率小于2时降速期间永远攒不够一个令牌
+                self._tokens = min(max(1, rate), self._tokens + (now - self._last) * rate / self.per)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.per / rate
+            time.sleep(wait)
+
+    def slow_down(self, duration=60.0):
+        """
+        在收到限流响应（HTTP 429）后调用，之后一段时间内速率减半
+
+        参数:
+            duration (float): 降低速率的持续时间（秒）
+        """
+        with self._lock:
+            self._slow_until = time.monotonic() + duration
+            self._tokens = min(self._tokens, max(1, self.rate / 2))
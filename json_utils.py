@@ -0,0 +1,36 @@
+import json
+
+# orjson为可选依赖，解析速度明显快于标准库json；未安装时回退到标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(data):
+    """
+    解析JSON数据
+
+    参数:
+        data (bytes|str): JSON数据，可直接传入response.content以省去解码为字符串的步骤
+
+    返回:
+        解析后的Python对象
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj, indent=False):
+    """
+    将Python对象序列化为UTF-8编码的JSON数据
+
+    参数:
+        obj: 要序列化的对象
+        indent (bool): 是否使用两个空格缩进
+
+    返回:
+        bytes: JSON数据，非ASCII字符不转义
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
@@ -1,13 +1,21 @@
 import argparse
+import logging
 from arxiv_client import ArxivClient
 from paper_manager import PaperManager
 import re
 from translate import Translator
 
+logger = logging.getLogger(__name__)
+
+# 匹配中文字符的正则表达式，预先编译以避免每次调用时查找正则缓存
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
 # 判断文本是否包含中文
 def contains_chinese(text):
     """检查文本是否包含中文字符"""
-    return bool(re.search(r'[\u4e00-\u9fff]', text))
+    if not text:
+        return False
+    return _CJK_RE.search(text) is not None
 
 # 翻译中文到英文
 def translate_to_english(text):
@@ -20,11 +28,12 @@ def translate_to_english(text):
         translated = translator.translate(text)
         return translated, True
     except Exception as e:
-        print(f"翻译出错: {str(e)}，将使用原始文本")
+        logger.warning("翻译出错: %s，将使用原始文本", e)
         return text, False
 
 def main():
     parser = argparse.ArgumentParser(description='ArXiv 综述整理工具')
+    parser.add_argument('-v', '--verbose', action='store_true', help='输出详细的运行日志')
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
     # 搜索命令
@@ -34,6 +43,7 @@ def main():
     search_parser.add_argument('--sort-by', choices=['relevance', 'lastUpdatedDate', 'submittedDate'], 
                               default='relevance', help='排序方式')
     search_parser.add_argument('--no-translate', action='store_true', help='禁用中文自动翻译')
+    search_parser.add_argument('--translate-titles', action='store_true', help='将论文标题批量翻译为中文后一并输出')
     
     # 下载命令
     download_parser = subparsers.add_parser('download', help='下载论文')
@@ -48,6 +58,12 @@ def main():
     
     args = parser.parse_args()
     
+    # 默认只输出警告和错误，--verbose时输出包括每个翻译块在内的详细日志
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format='%(levelname)s %(name)s: %(message)s'
+    )
+    
     arxiv_client = ArxivClient()
     paper_manager = PaperManager()
     
@@ -61,9 +77,17 @@ def main():
                 print(f"已将搜索关键词 \"{args.query}\" 翻译为: \"{query}\"")
         
         results = arxiv_client.search(query, args.max_results, args.sort_by)
+        
+        # 所有标题合并到一次请求中翻译
+        titles_zh = [None] * len(results)
+        if args.translate_titles:
+            titles_zh = arxiv_client.metadata_enricher.translate_texts([paper['title'] for paper in results])
+        
         print(f"\n找到 {len(results)} 篇论文:")
-        for i, paper in enumerate(results, 1):
+        for i, (paper, title_zh) in enumerate(zip(results, titles_zh), 1):
             print(f"\n{i}. {paper['title']} (ID: {paper['id']})")
+            if title_zh and title_zh != paper['title']:
+                print(f"   中文标题: {title_zh}")
             print(f"   作者: {', '.join(paper['authors'])}")
             print(f"   发布: {paper['published']}")
             print(f"   摘要: {paper['summary'][:200]}...")
@@ -73,10 +97,15 @@ def main():
         print(f"论文已下载至: {output_path}")
     
     elif args.command == 'organize':
-        result = paper_manager.organize(args.input_dir, args.output_format)
         output_file = f"review.{'md' if args.output_format == 'markdown' else 'json'}"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(result)
+        if args.output_format == 'markdown':
+            # 逐篇写入文件，不在内存中拼接完整的综述
+            with open(output_file, 'w', encoding='utf-8') as f:
+                paper_manager.organize_to(f, args.input_dir)
+        else:
+            result = paper_manager.organize_bytes(args.input_dir, args.output_format)
+            with open(output_file, 'wb') as f:
+                f.write(result)
         print(f"综述已生成: {output_file}")
 
 if __name__ == "__main__":
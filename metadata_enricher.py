@@ -1,9 +1,57 @@
-import requests
-import time
-import urllib.parse
 import json
+import logging
+import hashlib
+import threading
 from translate import Translator
+from json_utils import loads as json_loads
+from disk_cache import DiskCache
+from http_utils import create_session, TokenBucket
 import re
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# re2为可选依赖，基于DFA匹配，长文本中查找句子边界更快；未安装时回退到标准库re
+try:
+    import re2 as _sentence_re
+except ImportError:
+    _sentence_re = re
+
+logger = logging.getLogger(__name__)
+
+# 内存中最多保留的翻译结果数量，超出时淘汰最久未使用的结果
+TRANSLATION_CACHE_MAX_SIZE = 2048
+
+# Semantic Scholar元数据在磁盘缓存中的有效期（秒）
+SEMANTIC_SCHOLAR_CACHE_TTL = 24 * 60 * 60
+
+# 同时翻译的文本块数量上限
+MAX_CONCURRENT_CHUNKS = 4
+
+# 批量翻译时用于分隔各段文本的标记
+BATCH_TRANSLATE_MARKER = "∯∯∯"
+BATCH_TRANSLATE_SEPARATOR = f"\n{BATCH_TRANSLATE_MARKER}\n"
+# 单次批量翻译请求的最大字符数，避免URL过长
+BATCH_TRANSLATE_MAX_CHARS = 4500
+
+# 匹配中文字符的正则表达式，预先编译以避免每次调用时查找正则缓存
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+# 匹配句子结束标志（句号、问号或感叹号后跟空格或换行）
+_SENTENCE_END_RE = _sentence_re.compile(r'[.?!][ \n]')
+
+def translation_cache_key(text, from_lang, to_lang):
+    """根据完整文本和语言对生成翻译缓存的键，语言对作为blake2b的密钥，一次哈希即可区分不同语言对"""
+    return hashlib.blake2b(
+        text.encode("utf-8"), digest_size=16, key=f"{from_lang}|{to_lang}".encode("utf-8")
+    ).hexdigest()
+
+def is_translation_error(translated):
+    """检查翻译结果是否为空或为翻译服务返回的错误信息"""
+    if not translated:
+        return True
+    upper_text = translated.upper()
+    return "MYMEMORY WARNING" in upper_text or "QUOTA EXCEEDED" in upper_text
 
 class MetadataEnricher:
     """
@@ -11,9 +59,16 @@ class MetadataEnricher:
     """
     
     def __init__(self):
-        self.translation_cache = {}  # 用于缓存翻译结果
+        self.session = create_session()  # 复用连接的HTTP会话
+        self.semantic_scholar_limiter = TokenBucket(rate=5, per=1.0)  # Semantic Scholar请求限流
+        self.semantic_scholar_cache = DiskCache("semantic_scholar")  # 按论文ID缓存增强元数据
+        self.translation_cache = OrderedDict()  # 用于缓存翻译结果（内存中的一级缓存，按LRU淘汰）
+        self._translation_cache_lock = threading.Lock()  # 实例被多个会话和翻译线程共享，串行化内存缓存的读写
+        self.translation_disk_cache = DiskCache("translations")  # 持久化的二级缓存，重启后仍可复用
         self.translation_fail_count = 0  # 记录主要翻译方法失败次数
         self.use_google_translate = False  # 是否直接使用Google翻译
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CHUNKS)  # 用于并发翻译长文本的各个块
+        self._translators = {}  # 按(源语言, 目标语言)复用的Translator实例
     
     def enrich_with_semantic_scholar(self, arxiv_id):
         """
@@ -22,17 +77,22 @@ class MetadataEnricher:
         # 移除可能的'arxiv:'前缀
         if arxiv_id.startswith('arxiv:'):
             arxiv_id = arxiv_id[6:]
+        
+        # 检查缓存
+        cached = self.semantic_scholar_cache.get(arxiv_id)
+        if cached is not None:
+            return cached
             
         # 构建API URL
         url = f"https://api.semanticscholar.org/v1/paper/arXiv:{arxiv_id}"
         
         try:
-            # 添加等待以避免API限流
-            time.sleep(1)
-            response = requests.get(url, timeout=10)  # 添加超时参数
+            # 请求过于频繁时等待，以避免API限流
+            self.semantic_scholar_limiter.acquire()
+            response = self.session.get(url, timeout=10)  # 添加超时参数
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 
                 # 提取有用的元数据
                 additional_data = {
@@ -46,20 +106,25 @@ class MetadataEnricher:
                     'topics': [topic.get('name') for topic in data.get('topics', [])] if data.get('topics') else []
                 }
                 
+                # 只缓存成功获取的元数据
+                self.semantic_scholar_cache.set(arxiv_id, additional_data, expire=SEMANTIC_SCHOLAR_CACHE_TTL)
                 return additional_data
             else:
-                print(f"Semantic Scholar API请求失败: {response.status_code}")
+                if response.status_code == 429:
+                    # 被限流后暂时降低请求速率
+                    self.semantic_scholar_limiter.slow_down()
+                logger.warning("Semantic Scholar API请求失败: %s", response.status_code)
                 return {}
                 
         except Exception as e:
-            print(f"获取额外元数据时出错: {str(e)}")
+            logger.warning("获取额外元数据时出错: %s", e)
             return {}
     
     def contains_chinese(self, text):
         """检查文本是否包含中文字符"""
         if not text:
             return False
-        return bool(re.search(r'[\u4e00-\u9fff]', text))
+        return _CJK_RE.search(text) is not None
     
     def chunk_text(self, text, max_chunk_size=450):
         """
@@ -77,6 +142,9 @@ class MetadataEnricher:
             return [text]
             
         chunks = []
+        # 一次性找出所有句子结束标志的位置，之后每个块只需二分查找
+        sentence_ends = [match.start() for match in _SENTENCE_END_RE.finditer(text)]
+        
         # 尝试在句子结束处分割
         start = 0
         while start < len(text):
@@ -88,15 +156,9 @@ class MetadataEnricher:
             # 寻找最大块内的最后一个句号、问号或感叹号
             end = start + max_chunk_size
             
-            # 向后查找句子结束标志
-            sentence_end = max(
-                text.rfind('. ', start, end),
-                text.rfind('? ', start, end),
-                text.rfind('! ', start, end),
-                text.rfind('.\n', start, end),
-                text.rfind('?\n', start, end),
-                text.rfind('!\n', start, end)
-            )
+            # 查找块内最后一个句子结束标志（标志的两个字符都需在块内）
+            index = bisect_right(sentence_ends, end - 2) - 1
+            sentence_end = sentence_ends[index] if index >= 0 and sentence_ends[index] >= start else -1
             
             # 如果找不到句子结束，则在单词边界分割
             if sentence_end == -1:
@@ -124,25 +186,22 @@ class MetadataEnricher:
             }
             
             # 发送请求
-            encoded_params = urllib.parse.urlencode(params)
-            full_url = f"{url}?{encoded_params}"
-            response = requests.get(full_url, timeout=5)
+            response = self.session.get(url, params=params, timeout=5)
             
             if response.status_code != 200:
-                print(f"Google翻译请求失败: {response.status_code}")
+                logger.warning("Google翻译请求失败: %s", response.status_code)
                 return text
             
             # 解析响应（Google Translate返回的是嵌套列表）
-            result = response.json()
-            # 第一个列表包含翻译结果，我们需要合并所有翻译片段
-            translated_text = ""
-            for sentence in result[0]:
-                if sentence[0]:
-                    translated_text += sentence[0]
+            result = json_loads(response.content)
+            if not result or not result[0]:
+                logger.warning("Google翻译返回格式异常")
+                return text
             
-            return translated_text
+            # 第一个列表包含翻译结果，我们需要合并所有翻译片段
+            return "".join(sentence[0] for sentence in result[0] if sentence and sentence[0])
         except Exception as e:
-            print(f"Google翻译出错: {str(e)}")
+            logger.warning("Google翻译出错: %s", e)
             return text
     
     def translate_text(self, text, to_lang="zh", from_lang="en"):
@@ -154,18 +213,19 @@ class MetadataEnricher:
             
         # 检查是否需要翻译
         if to_lang == "zh" and self.contains_chinese(text):
-            print("文本已经包含中文，无需翻译")
+            logger.debug("文本已经包含中文，无需翻译")
             return text  # 已经是中文，不需要翻译
             
-        # 检查缓存
-        cache_key = f"{text[:30]}_{from_lang}_{to_lang}"
-        if cache_key in self.translation_cache:
-            print("使用缓存的翻译结果")
-            return self.translation_cache[cache_key]
+        # 检查缓存（键由完整文本和语言对生成，避免不同文本共用同一条缓存）
+        cache_key = translation_cache_key(text, from_lang, to_lang)
+        cached = self._get_cached_translation(cache_key)
+        if cached is not None:
+            logger.debug("使用缓存的翻译结果")
+            return cached
             
         # 如果之前的主要翻译方法已经失败3次以上，直接使用Google翻译
         if self.translation_fail_count >= 3 or self.use_google_translate:
-            print(f"由于之前翻译失败次数较多，直接使用Google翻译")
+            logger.info("由于之前翻译失败次数较多，直接使用Google翻译")
             self.use_google_translate = True  # 标记使用Google翻译
             
             try:
@@ -175,39 +235,37 @@ class MetadataEnricher:
                 if len(chunks) == 1:
                     # 单个块直接翻译
                     translated = self.google_translate(chunks[0], to_lang, from_lang)
-                    self.translation_cache[cache_key] = translated
+                    self._cache_translation(cache_key, text, translated)
                     return translated
                 else:
-                    # 多个块分别翻译
-                    translated_chunks = []
-                    for chunk in chunks:
-                        time.sleep(0.5)  # 避免请求过于频繁
-                        translated_chunk = self.google_translate(chunk, to_lang, from_lang)
-                        translated_chunks.append(translated_chunk)
+                    # 多个块并发翻译，线程池大小限制了同时发出的请求数
+                    translated_chunks = list(self._executor.map(
+                        lambda chunk: self.google_translate(chunk, to_lang, from_lang), chunks
+                    ))
                     
                     # 合并翻译结果
-                    translated = ' '.join(translated_chunks)
-                    self.translation_cache[cache_key] = translated
+                    translated = self._join_chunks(translated_chunks, to_lang)
+                    self._cache_translation(cache_key, text, translated)
                     return translated
             except Exception as e:
-                print(f"Google翻译失败: {str(e)}")
+                logger.warning("Google翻译失败: %s", e)
                 return text  # 出错时返回原始文本
             
         try:
             # 分割长文本
             chunks = self.chunk_text(text)
-            print(f"将文本分割成{len(chunks)}个块进行翻译")
+            logger.debug("将文本分割成%s个块进行翻译", len(chunks))
             
             if len(chunks) == 1:
                 # 单个块可以直接翻译
-                print(f"翻译单个文本块，长度: {len(chunks[0])}")
+                logger.debug("翻译单个文本块，长度: %s", len(chunks[0]))
                 try:
-                    translator = Translator(to_lang=to_lang, from_lang=from_lang)
+                    translator = self._get_translator(from_lang, to_lang)
                     translated = translator.translate(chunks[0])
                     
                     # 检查是否为错误信息
-                    if "MYMEMORY WARNING" in translated.upper() or "QUOTA EXCEEDED" in translated.upper():
-                        print("主要翻译API配额已用完，切换到Google翻译")
+                    if is_translation_error(translated):
+                        logger.warning("主要翻译API配额已用完，切换到Google翻译")
                         self.translation_fail_count += 1
                         self.use_google_translate = True
                         
@@ -215,76 +273,212 @@ class MetadataEnricher:
                         translated = self.google_translate(chunks[0], to_lang, from_lang)
                     
                     # 保存到缓存
-                    self.translation_cache[cache_key] = translated
+                    self._cache_translation(cache_key, text, translated)
                     return translated
                 except Exception as e:
-                    print(f"主要翻译方法失败: {str(e)}")
+                    logger.warning("主要翻译方法失败: %s", e)
                     self.translation_fail_count += 1
                     
                     # 尝试Google翻译
                     try:
                         translated = self.google_translate(chunks[0], to_lang, from_lang)
-                        self.translation_cache[cache_key] = translated
+                        self._cache_translation(cache_key, text, translated)
                         return translated
                     except:
                         return text  # 如果备用方法也失败，返回原文
             else:
-                # 多个块需要分别翻译并合并
-                print(f"开始翻译多个文本块")
-                translated_chunks = []
-                
-                for i, chunk in enumerate(chunks):
-                    print(f"翻译块 {i+1}/{len(chunks)}, 长度: {len(chunk)}")
-                    time.sleep(0.5)  # 翻译API节流
-                    
-                    try:
-                        if self.use_google_translate:
-                            # 直接使用Google翻译
-                            translated_chunk = self.google_translate(chunk, to_lang, from_lang)
-                        else:
-                            # 尝试使用主要翻译方法
-                            translator = Translator(to_lang=to_lang, from_lang=from_lang)
-                            translated_chunk = translator.translate(chunk)
-                            
-                            # 检查是否为错误信息
-                            if "MYMEMORY WARNING" in translated_chunk.upper() or "QUOTA EXCEEDED" in translated_chunk.upper():
-                                print(f"块 {i+1} 翻译时主要API配额已用完，切换到Google翻译")
-                                self.translation_fail_count += 1
-                                self.use_google_translate = True
-                                
-                                # 使用Google翻译
-                                translated_chunk = self.google_translate(chunk, to_lang, from_lang)
-                        
-                        translated_chunks.append(translated_chunk)
-                        print(f"块 {i+1} 翻译成功")
-                    except Exception as chunk_error:
-                        print(f"块 {i+1} 翻译失败: {str(chunk_error)}")
-                        self.translation_fail_count += 1
-                        
-                        # 尝试Google翻译
-                        try:
-                            translated_chunk = self.google_translate(chunk, to_lang, from_lang)
-                            translated_chunks.append(translated_chunk)
-                        except:
-                            # 如果备用方法也失败，使用原始块
-                            translated_chunks.append(chunk)
+                # 多个块并发翻译后按原顺序合并
+                logger.debug("开始翻译多个文本块")
+                futures = [
+                    self._executor.submit(self._translate_chunk, i, len(chunks), chunk, to_lang, from_lang)
+                    for i, chunk in enumerate(chunks)
+                ]
+                translated_chunks = [future.result() for future in futures]
                 
                 # 合并翻译结果
-                translated = ' '.join(translated_chunks)
-                print("所有块翻译完成并合并")
+                translated = self._join_chunks(translated_chunks, to_lang)
+                logger.debug("所有块翻译完成并合并")
                 
                 # 保存到缓存
-                self.translation_cache[cache_key] = translated
+                self._cache_translation(cache_key, text, translated)
                 return translated
                 
         except Exception as e:
-            print(f"翻译过程出错: {str(e)}")
+            logger.warning("翻译过程出错: %s", e)
             # 尝试Google翻译作为最后的备用方法
             try:
                 return self.google_translate(text, to_lang, from_lang)
             except:
                 return text  # 出错时返回原始文本
     
+    def _get_translator(self, from_lang, to_lang):
+        """获取指定语言对的Translator，同一语言对只创建一次"""
+        translator = self._translators.get((from_lang, to_lang))
+        if translator is None:
+            translator = Translator(to_lang=to_lang, from_lang=from_lang)
+            self._translators[(from_lang, to_lang)] = translator
+        return translator
+    
+    def _join_chunks(self, translated_chunks, to_lang):
+        """
+        合并翻译后的文本块
+        
+        中文不使用空格分隔句子，直接拼接；其他语言的翻译服务会去掉块首的空格，因此用空格连接
+        """
+        separator = '' if to_lang.startswith('zh') else ' '
+        return separator.join(chunk.strip() for chunk in translated_chunks)
+    
+    def translate_texts(self, texts, to_lang="zh", from_lang="en"):
+        """
+        批量翻译多段文本，将多段较短的文本合并到一次Google翻译请求中以减少网络往返
+        
+        参数:
+            texts (list): 要翻译的文本列表
+            to_lang (str): 目标语言
+            from_lang (str): 源语言
+            
+        返回:
+            list: 与输入顺序对应的翻译结果，空文本返回空字符串，翻译失败的项为None
+        """
+        translations = [None] * len(texts)
+        pending = {}  # 待翻译的文本 -> 在输入中的位置，相同的文本只翻译一次
+        for i, text in enumerate(texts):
+            if not text:
+                translations[i] = ""
+            elif to_lang == "zh" and self.contains_chinese(text):
+                translations[i] = text  # 已经是中文，不需要翻译
+            else:
+                cached = self._get_cached_translation(translation_cache_key(text, from_lang, to_lang))
+                if cached is not None:
+                    translations[i] = cached
+                else:
+                    pending.setdefault(text, []).append(i)
+        
+        # 按长度上限将待翻译文本分组，每组只发送一次请求；单段超过上限的文本分块单独翻译
+        groups = []
+        long_texts = []
+        group = []
+        group_length = 0
+        for text in pending:
+            length = len(text) + len(BATCH_TRANSLATE_SEPARATOR)
+            if length > BATCH_TRANSLATE_MAX_CHARS:
+                long_texts.append(text)
+                continue
+            if group and group_length + length > BATCH_TRANSLATE_MAX_CHARS:
+                groups.append(group)
+                group = []
+                group_length = 0
+            group.append(text)
+            group_length += length
+        if group:
+            groups.append(group)
+        
+        # 各组的请求在线程池中同时发送，map按提交顺序返回结果
+        joined_groups = [BATCH_TRANSLATE_SEPARATOR.join(group) for group in groups]
+        translated_groups = self._executor.map(
+            lambda joined: self.google_translate(joined, to_lang, from_lang), joined_groups
+        )
+        
+        # 超长文本在当前线程中翻译（其各个块同样在线程池中并发翻译），与各组的请求同时进行
+        for text in long_texts:
+            translated = self.translate_text(text, to_lang, from_lang)
+            if translated != text:
+                for i in pending[text]:
+                    translations[i] = translated
+        
+        for group, joined, translated_joined in zip(groups, joined_groups, translated_groups):
+            if translated_joined == joined:
+                logger.warning("批量翻译失败，跳过该批次")
+                continue
+            
+            parts = [part.strip() for part in translated_joined.split(BATCH_TRANSLATE_MARKER)]
+            if len(parts) != len(group):
+                logger.warning("批量翻译结果无法按分隔符拆分，跳过该批次")
+                continue
+            
+            for text, translated in zip(group, parts):
+                if is_translation_error(translated):
+                    continue
+                for i in pending[text]:
+                    translations[i] = translated
+                self._cache_translation(translation_cache_key(text, from_lang, to_lang), text, translated)
+        
+        return translations
+    
+    def _translate_chunk(self, index, total, chunk, to_lang, from_lang):
+        """
+        翻译长文本中的一个块，主要翻译方法失败时使用Google翻译
+        
+        参数:
+            index (int): 块的序号（从0开始）
+            total (int): 块的总数
+            chunk (str): 要翻译的文本块
+            to_lang (str): 目标语言
+            from_lang (str): 源语言
+            
+        返回:
+            str: 翻译后的文本块，所有方法都失败时返回原始块
+        """
+        logger.debug("翻译块 %s/%s, 长度: %s", index+1, total, len(chunk))
+        
+        try:
+            if self.use_google_translate:
+                # 直接使用Google翻译
+                translated_chunk = self.google_translate(chunk, to_lang, from_lang)
+            else:
+                # 尝试使用主要翻译方法
+                translator = self._get_translator(from_lang, to_lang)
+                translated_chunk = translator.translate(chunk)
+                
+                # 检查是否为错误信息
+                if is_translation_error(translated_chunk):
+                    logger.warning("块 %s 翻译时主要API配额已用完，切换到Google翻译", index+1)
+                    self.translation_fail_count += 1
+                    self.use_google_translate = True
+                    
+                    # 使用Google翻译
+                    translated_chunk = self.google_translate(chunk, to_lang, from_lang)
+            
+            logger.debug("块 %s 翻译成功", index+1)
+            return translated_chunk
+        except Exception as chunk_error:
+            logger.warning("块 %s 翻译失败: %s", index+1, chunk_error)
+            self.translation_fail_count += 1
+            
+            # 尝试Google翻译
+            try:
+                return self.google_translate(chunk, to_lang, from_lang)
+            except:
+                # 如果备用方法也失败，使用原始块
+                return chunk
+    
+    def _get_cached_translation(self, cache_key):
+        """依次从内存和磁盘缓存中读取翻译结果，未命中时返回None"""
+        with self._translation_cache_lock:
+            if cache_key in self.translation_cache:
+                self.translation_cache.move_to_end(cache_key)
+                return self.translation_cache[cache_key]
+        
+        cached = self.translation_disk_cache.get(cache_key)
+        if cached is not None:
+            self._remember_translation(cache_key, cached)
+        return cached
+    
+    def _cache_translation(self, cache_key, text, translated):
+        """缓存翻译结果，失败时返回的原文或错误信息不会被缓存"""
+        if translated == text or is_translation_error(translated):
+            return
+        self._remember_translation(cache_key, translated)
+        self.translation_disk_cache.set(cache_key, translated)
+    
+    def _remember_translation(self, cache_key, translated):
+        """将翻译结果放入内存缓存，超出容量时淘汰最久未使用的结果"""
+        with self._translation_cache_lock:
+            self.translation_cache[cache_key] = translated
+            self.translation_cache.move_to_end(cache_key)
+            if len(self.translation_cache) > TRANSLATION_CACHE_MAX_SIZE:
+                self.translation_cache.popitem(last=False)
+    
     def translate_paper_data(self, paper_data):
         """
         翻译论文的标题和摘要
@@ -297,7 +491,7 @@ class MetadataEnricher:
             try:
                 translated_data['title_zh'] = self.translate_text(paper_data['title'])
             except Exception as e:
-                print(f"标题翻译出错: {str(e)}")
+                logger.warning("标题翻译出错: %s", e)
                 translated_data['title_zh'] = paper_data['title']
             
         # 翻译摘要
@@ -305,7 +499,7 @@ class MetadataEnricher:
             try:
                 translated_data['summary_zh'] = self.translate_text(paper_data['summary'])
             except Exception as e:
-                print(f"摘要翻译出错: {str(e)}")
+                logger.warning("摘要翻译出错: %s", e)
                 translated_data['summary_zh'] = paper_data['summary']
             
         return translated_data 
\ No newline at end of file
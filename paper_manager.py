@@ -1,51 +1,378 @@
 import os
+import atexit
 import json
-import glob
+import mmap
+import multiprocessing
+import re
+import time
+import logging
+import sqlite3
+import tempfile
+import threading
 import PyPDF2
+from json_utils import loads as json_loads, dumps as json_dumps
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from disk_cache import DiskCache
+
+# pypdfium2为可选依赖，基于C++实现的PDFium提取文本，比纯Python的PyPDF2快得多；未安装时使用PyPDF2
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# 下载日期和综述生成时间的格式
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+# 综述中展示的PDF摘要长度（字符数）
+SUMMARY_LENGTH = 500
+
+# 提取失败时返回的文本前缀，这类结果不会被缓存
+EXTRACT_ERROR_PREFIX = "无法提取文本"
+
+# 当前使用的PDF文本提取方式，不同方式提取的文本不同，作为缓存键的一部分
+PDF_BACKEND = "pdfium" if pdfium is not None else "pypdf2"
+
+# 匹配元数据文件中"键: 值"格式的行，键为第一个冒号之前的内容
+_META_RE = re.compile(r'^([^:\n]+):(.*)$', re.M)
+
+# 下载状态的保留时长（秒），超过该时长的记录（已完成或已中断的下载）会被清除
+DOWNLOAD_STATE_TTL = 5 * 60
+
+# 修改论文或分类数据后导出JSON文件的最短间隔（秒）
+JSON_EXPORT_INTERVAL = 300
+
+# 生成Markdown综述时每批处理的论文数量
+MD_RENDER_CHUNK_SIZE = 64
+
+# 并发读取元数据文件的线程数，使磁盘上同时有多个读请求
+METADATA_READ_WORKERS = 8
+
+def _prefetch_file(path):
+    """提示内核在后台预读整个文件，不支持posix_fadvise的平台（如Windows）上不做任何操作"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _read_json(path, default):
+    """
+    一次读取整个JSON文件并解析
+
+    参数:
+        path (str): 文件路径
+        default: 文件不存在、为空或内容无效时返回的值
+
+    返回:
+        解析后的Python对象
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        return json_loads(data) if data else default
+    except (json.JSONDecodeError, FileNotFoundError):
+        return default
+
+def _write_file_atomic(path, data):
+    """
+    原子地写入文件：先完整写入同目录下的临时文件并刷到磁盘，再替换目标文件，
+    写入过程中崩溃不会留下只写了一半的文件
+
+    参数:
+        path (str): 目标文件路径
+        data (bytes): 要写入的数据
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp创建的文件只有所有者可读写，改为与普通文件相同的权限
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _format_md_header():
+    """生成Markdown综述的标题和生成时间"""
+    return f"# 论文综述\n\n*生成时间: {datetime.now().strftime(_TS_FMT)}*\n\n"
+
+def _format_md_section(paper):
+    """
+    生成单篇论文在Markdown综述中的段落
+
+    参数:
+        paper (dict): organize()整理出的论文信息
+
+    返回:
+        str: Markdown段落
+    """
+    return (
+        f"## {paper['title']}\n\n"
+        f"**ID:** {paper['id']}  \n"
+        f"**作者:** {', '.join(paper['authors'])}  \n"
+        f"**发布日期:** {paper['published']}  \n\n"
+        f"### 摘要\n\n{paper['summary']}\n\n"
+        f"### 提取的内容\n\n{paper['extracted_text']}\n\n"
+        "---\n\n"
+    )
+
+def _extract_pdf_text(pdf_path, max_chars=None):
+    """从PDF中提取文本，定义在模块级别以便在子进程中执行；指定max_chars时提取到足够的文本后即停止"""
+    text = ""
+    try:
+        if pdfium is not None:
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                for page in pdf:
+                    text += page.get_textpage().get_text_range() + "\n"
+                    if max_chars is not None and len(text) >= max_chars:
+                        break
+            finally:
+                pdf.close()
+        else:
+            # PyPDF2解析时会频繁跳转读取交叉引用表和各个对象，映射到内存后直接访问页缓存，
+            # 不再为每次读取调用read()并复制到缓冲区
+            with open(pdf_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                reader = PyPDF2.PdfReader(mapped)
+                for page in reader.pages:
+                    text += page.extract_text() + "\n"
+                    if max_chars is not None and len(text) >= max_chars:
+                        break
+    except Exception as e:
+        text = f"{EXTRACT_ERROR_PREFIX}: {str(e)}"
+    return text
+
+# 提取PDF文本的子进程不通过fork创建：整理论文时还有读取元数据的线程在运行，在多线程进程中fork并不安全
+_PROCESS_POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+class _LazyProcessPool:
+    """
+    首次使用时才启动的进程池，整理一次论文期间的各批PDF共用同一个进程池；
+    所有PDF都命中缓存时不会启动任何子进程
+    """
+
+    def __init__(self):
+        self._executor = None
+
+    def get(self):
+        """获取进程池，尚未启动时启动"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(mp_context=_PROCESS_POOL_CONTEXT)
+        return self._executor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
 class PaperManager:
-    def __init__(self, papers_file="papers.json", categories_file="categories.json"):
+    def __init__(self, papers_file="papers.json", categories_file="categories.json", downloads_file="downloads.json", db_file=None):
         """
         初始化论文管理器
         
         参数:
-            papers_file (str): 论文信息文件路径
-            categories_file (str): 分类信息文件路径
+            papers_file (str): 论文信息的JSON导出文件路径，新建数据库时从该文件导入已有论文
+            categories_file (str): 分类信息的JSON导出文件路径，新建数据库时从该文件导入已有分类
+            downloads_file (str): 下载状态文件路径
+            db_file (str): 保存论文和分类数据的SQLite数据库路径，为None时使用与papers_file同名的.db文件
         """
         self.papers_file = papers_file
         self.categories_file = categories_file
+        self.downloads_file = downloads_file
+        # 不同的论文文件使用各自的数据库，如papers.json对应papers.db
+        self.db_file = db_file if db_file is not None else os.path.splitext(papers_file)[0] + ".db"
+        
+        # 批量修改期间所有修改在同一个事务中，结束时统一提交
+        self._batching = False
+        # 批量修改开始的时间，作为期间添加的所有论文的下载日期
+        self._batch_ts = None
+        
+        # 上次导出JSON文件的时间，修改数据后最多每隔JSON_EXPORT_INTERVAL秒导出一次；
+        # 间隔内的修改记为未导出，到期后由定时器导出，退出时也会导出
+        self._last_export = None
+        self._export_dirty = False
+        self._export_timer = None
+        self._export_lock = threading.Lock()
+        atexit.register(self._flush_export)
+        
+        # PDF下载后不会再改变，提取的文本按文件路径、修改时间和大小缓存在磁盘上
+        self.pdf_text_cache = DiskCache("pdf_text")
+        
+        # 综述中每篇论文的Markdown段落，按PDF和元数据文件的修改时间和大小缓存
+        self.md_section_cache = DiskCache("md_section")
+        
+        # 下载状态会被多个下载线程同时更新，用锁串行化读写
+        self._downloads_lock = threading.Lock()
+        # 解析后的下载状态，文件未改变时直接复用，避免每次重新运行页面都重新解析
+        self._downloads_cache = None
+        self._downloads_stamp = None
+        
+        # 数据库连接被Streamlit的多个会话线程和下载线程共享，用锁串行化访问；
+        # 批量修改期间会在持有锁的情况下再次获取，因此使用可重入锁
+        self._db_lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_file, timeout=10, check_same_thread=False)
+        self._init_db()
+    
+    def _init_db(self):
+        """创建数据表，新建的数据库从已有的JSON文件导入论文和分类数据"""
+        with self._db_lock:
+            # WAL模式下每次修改只追加写入日志，不再重写整个文件，读取也不会被写入阻塞
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS papers ("
+                    "id TEXT PRIMARY KEY, "
+                    "data TEXT NOT NULL, "
+                    "download_date TEXT, "
+                    "local_path TEXT)"
+                )
+                self._conn.execute("CREATE TABLE IF NOT EXISTS categories (name TEXT PRIMARY KEY)")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS category_members ("
+                    "category TEXT NOT NULL, "
+                    "paper_id TEXT NOT NULL, "
+                    "PRIMARY KEY (category, paper_id))"
+                )
+                self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                
+                # 版本号记录已插入说明数据库是新建的
+                cursor = self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('papers_version', 0)")
+                if cursor.rowcount:
+                    self._import_json()
+    
+    def _import_json(self):
+        """从JSON文件导入论文和分类数据，需要在事务中调用"""
+        papers = _read_json(self.papers_file, {})
+        categories = _read_json(self.categories_file, {"categories": {}, "default": []})
+        
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO papers (id, data, download_date, local_path) VALUES (?, ?, ?, ?)",
+            [
+                (paper_id, json_dumps(paper).decode('utf-8'), paper.get('download_date'), paper.get('local_path'))
+                for paper_id, paper in papers.items()
+            ]
+        )
+        for category_name, paper_ids in categories.get('categories', {}).items():
+            self._conn.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category_name,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO category_members (category, paper_id) VALUES (?, ?)",
+                [(category_name, paper_id) for paper_id in paper_ids]
+            )
+        
+        if papers or categories.get('categories'):
+            logger.info("已从JSON文件导入%d篇论文和%d个分类", len(papers), len(categories.get('categories', {})))
+    
+    def extract_text_from_pdf(self, pdf_path, max_chars=None):
+        """
+        从PDF中提取文本
         
-        # 确保文件存在
-        if not os.path.exists(papers_file):
-            with open(papers_file, 'w') as f:
-                json.dump({}, f)
+        参数:
+            pdf_path (str): PDF文件路径
+            max_chars (int): 需要的最大字符数，提取到足够的文本后不再解析后续页面，为None时提取全部文本
+            
+        返回:
+            str: 提取的文本
+        """
+        return self._extract_pdf_texts([pdf_path], max_chars)[0]
+    
+    def _extract_pdf_texts(self, pdf_paths, max_chars=None, pool=None):
+        """
+        从多个PDF中提取文本，优先使用缓存，未缓存的PDF在多个进程中并行提取
         
-        if not os.path.exists(categories_file):
-            with open(categories_file, 'w') as f:
-                json.dump({"categories": {}, "default": []}, f)
+        参数:
+            pdf_paths (list): PDF文件路径列表
+            max_chars (int): 每个PDF需要的最大字符数，为None时提取全部文本
+            pool (_LazyProcessPool): 复用的进程池，为None时按需临时创建
+            
+        返回:
+            list: 与输入顺序对应的提取文本
+        """
+        texts = [None] * len(pdf_paths)
+        pending = []
+        for i, pdf_path in enumerate(pdf_paths):
+            cache_key = self._pdf_text_cache_key(pdf_path, max_chars)
+            cached = self.pdf_text_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                texts[i] = cached
+            else:
+                pending.append((i, cache_key))
+        
+        # 预读会立即返回，所有未缓存PDF的读请求同时提交给磁盘，解析时数据大多已在页缓存中
+        for i, _ in pending:
+            _prefetch_file(pdf_paths[i])
+        
+        if len(pending) == 1:
+            # 只有一个PDF时无需启动进程池
+            i, cache_key = pending[0]
+            pending_texts = [_extract_pdf_text(pdf_paths[i], max_chars)]
+        elif pending:
+            # PyPDF2提取文本是CPU密集型操作，在多个进程中并行提取
+            with (_LazyProcessPool() if pool is None else nullcontext(pool)) as process_pool:
+                pending_texts = list(process_pool.get().map(
+                    partial(_extract_pdf_text, max_chars=max_chars),
+                    [pdf_paths[i] for i, _ in pending],
+                    chunksize=4
+                ))
+        else:
+            pending_texts = []
+        
+        for (i, cache_key), text in zip(pending, pending_texts):
+            texts[i] = text
+            if cache_key and not text.startswith(EXTRACT_ERROR_PREFIX):
+                self.pdf_text_cache.set(cache_key, text)
+        
+        return texts
     
-    def extract_text_from_pdf(self, pdf_path):
-        """从PDF中提取文本"""
-        text = ""
+    @staticmethod
+    def _pdf_text_cache_key(pdf_path, max_chars):
+        """
+        生成PDF文本缓存的键，文件被替换或修改后键随之改变
+        
+        参数:
+            pdf_path (str): PDF文件路径
+            max_chars (int): 提取的最大字符数
+            
+        返回:
+            str: 缓存键，无法获取文件信息时返回None
+        """
         try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-        except Exception as e:
-            text = f"无法提取文本: {str(e)}"
-        return text
+            stat = os.stat(pdf_path)
+        except OSError:
+            return None
+        return f"{PDF_BACKEND}|{os.path.abspath(pdf_path)}|{stat.st_mtime_ns}|{stat.st_size}|{max_chars}"
     
     def read_metadata(self, meta_path):
         """读取元数据文件"""
-        metadata = {}
         try:
             with open(meta_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        metadata[key.strip()] = value.strip()
+                content = f.read()
+            # 一次正则扫描整个文件，不再逐行判断和拆分
+            metadata = {match.group(1).strip(): match.group(2).strip() for match in _META_RE.finditer(content)}
         except Exception as e:
             metadata = {"error": f"无法读取元数据: {str(e)}"}
         return metadata
@@ -61,53 +388,183 @@ class PaperManager:
         返回:
             str: 生成的综述内容
         """
-        # 查找所有PDF文件
-        pdf_files = glob.glob(os.path.join(input_dir, "*.pdf"))
+        # 根据输出格式生成综述
+        if output_format == 'json':
+            # JSON直接序列化为UTF-8字节，只在返回前解码一次
+            return self.organize_bytes(input_dir, output_format).decode('utf-8')
+        else:  # markdown
+            # 先收集各部分再一次性拼接，避免反复拼接字符串
+            parts = [_format_md_header()]
+            with _LazyProcessPool() as pool:
+                parts.extend(self._iter_md_sections(self._collect_papers(input_dir), pool))
+            return "".join(parts)
+    
+    def organize_to(self, writer, input_dir='papers'):
+        """
+        整理论文并将Markdown综述逐篇写入writer，不在内存中拼接完整的综述
+        
+        参数:
+            writer: 有write(str)方法的对象，如以文本模式打开的文件
+            input_dir (str): 输入目录
+            
+        返回:
+            int: 写入的论文数量
+        """
+        papers = self._collect_papers(input_dir)
+        writer.write(_format_md_header())
+        with _LazyProcessPool() as pool:
+            for section in self._iter_md_sections(papers, pool):
+                writer.write(section)
+        return len(papers)
+    
+    def organize_bytes(self, input_dir='papers', output_format='markdown'):
+        """
+        整理论文并生成UTF-8编码的综述，写入文件或通过网络发送时可省去编码步骤
+        
+        参数:
+            input_dir (str): 输入目录
+            output_format (str): 输出格式 (markdown 或 json)
+            
+        返回:
+            bytes: UTF-8编码的综述内容
+        """
+        if output_format == 'json':
+            with _LazyProcessPool() as pool:
+                return json_dumps(self._build_paper_data(self._collect_papers(input_dir), pool), indent=True)
+        return self.organize(input_dir, output_format).encode('utf-8')
+    
+    @staticmethod
+    def _collect_papers(input_dir):
+        """
+        查找输入目录中所有有对应元数据文件的PDF文件
+        
+        参数:
+            input_dir (str): 输入目录
+            
+        返回:
+            list: (论文ID, PDF文件路径, 元数据文件路径)列表，目录不存在时返回空列表
+        """
+        # 只遍历一次目录，不再逐个检查元数据文件是否存在
+        pdf_files = {}
+        meta_files = {}
+        try:
+            with os.scandir(input_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    # 与glob一致，忽略隐藏文件
+                    if name.startswith('.') or not entry.is_file():
+                        continue
+                    if name.endswith('.meta.txt'):
+                        meta_files[name[:-len('.meta.txt')]] = entry.path
+                    elif name.endswith('.pdf'):
+                        pdf_files[name[:-len('.pdf')]] = entry.path
+        except FileNotFoundError:
+            pass
+        
+        return [
+            (paper_id, pdf_file, meta_files[paper_id])
+            for paper_id, pdf_file in pdf_files.items()
+            if paper_id in meta_files
+        ]
+    
+    def _build_paper_data(self, papers, pool=None):
+        """
+        读取论文的元数据并提取PDF摘要
+        
+        参数:
+            papers (list): (论文ID, PDF文件路径, 元数据文件路径)列表
+            pool (_LazyProcessPool): 提取PDF文本时复用的进程池
+            
+        返回:
+            list: 与输入顺序对应的论文信息
+        """
+        # 元数据文件很小，耗时主要在等待磁盘，先提交到多个线程中并发读取，与PDF文本提取同时进行
+        with ThreadPoolExecutor(max_workers=METADATA_READ_WORKERS) as executor:
+            metadata_results = executor.map(self.read_metadata, [meta_file for _, _, meta_file in papers])
+            
+            # 只需要摘要部分，读到足够的文本后即停止解析后续页面
+            pdf_texts = self._extract_pdf_texts(
+                [pdf_file for _, pdf_file, _ in papers], max_chars=SUMMARY_LENGTH + 1, pool=pool
+            )
+            metadatas = list(metadata_results)
+        
         results = []
+        for (paper_id, pdf_file, meta_file), pdf_text, metadata in zip(papers, pdf_texts, metadatas):
+            # 提取PDF摘要（前500个字符）
+            summary = pdf_text[:SUMMARY_LENGTH] + "..." if len(pdf_text) > SUMMARY_LENGTH else pdf_text
+            
+            # 添加到结果列表
+            paper_data = {
+                'id': paper_id,
+                'title': metadata.get('title', '未知标题'),
+                'authors': metadata.get('authors', '未知作者').split(', '),
+                'published': metadata.get('published', '未知日期'),
+                'summary': metadata.get('summary', '未提供摘要'),
+                'extracted_text': summary
+            }
+            results.append(paper_data)
+        
+        return results
+    
+    def _iter_md_sections(self, papers, pool=None):
+        """
+        依次生成各论文在Markdown综述中的段落
         
-        for pdf_file in pdf_files:
-            # 从文件名中获取论文ID
-            paper_id = os.path.basename(pdf_file).replace('.pdf', '')
+        参数:
+            papers (list): (论文ID, PDF文件路径, 元数据文件路径)列表
+            pool (_LazyProcessPool): 各批论文提取PDF文本时共用的进程池
             
-            # 查找对应的元数据文件
-            meta_file = os.path.join(input_dir, f"{paper_id}.meta.txt")
+        返回:
+            generator: 与输入顺序对应的Markdown段落
+        """
+        # 分批生成段落，同时只保留一批论文的内容，每批内未缓存的PDF仍然并行提取
+        for start in range(0, len(papers), MD_RENDER_CHUNK_SIZE):
+            yield from self._render_md_sections(papers[start:start + MD_RENDER_CHUNK_SIZE], pool)
+    
+    def _render_md_sections(self, papers, pool=None):
+        """
+        生成各论文在Markdown综述中的段落，PDF和元数据文件未改变的论文直接使用缓存的段落，
+        无需再读取元数据和提取PDF文本
+        
+        参数:
+            papers (list): (论文ID, PDF文件路径, 元数据文件路径)列表
+            pool (_LazyProcessPool): 提取PDF文本时复用的进程池
             
-            if os.path.exists(meta_file):
-                # 读取元数据
-                metadata = self.read_metadata(meta_file)
-                
-                # 提取PDF摘要（前500个字符）
-                pdf_text = self.extract_text_from_pdf(pdf_file)
-                summary = pdf_text[:500] + "..." if len(pdf_text) > 500 else pdf_text
-                
-                # 添加到结果列表
-                paper_data = {
-                    'id': paper_id,
-                    'title': metadata.get('title', '未知标题'),
-                    'authors': metadata.get('authors', '未知作者').split(', '),
-                    'published': metadata.get('published', '未知日期'),
-                    'summary': metadata.get('summary', '未提供摘要'),
-                    'extracted_text': summary
-                }
-                results.append(paper_data)
+        返回:
+            list: 与输入顺序对应的Markdown段落
+        """
+        cache_keys = [self._md_section_cache_key(pdf_file, meta_file) for _, pdf_file, meta_file in papers]
+        sections = [self.md_section_cache.get(cache_key) if cache_key else None for cache_key in cache_keys]
         
-        # 根据输出格式生成综述
-        if output_format == 'json':
-            return json.dumps(results, ensure_ascii=False, indent=2)
-        else:  # markdown
-            markdown = "# 论文综述\n\n"
-            markdown += f"*生成时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n"
+        missing = [i for i, section in enumerate(sections) if section is None]
+        for i, paper in zip(missing, self._build_paper_data([papers[i] for i in missing], pool)):
+            sections[i] = _format_md_section(paper)
+            if cache_keys[i] and not paper['extracted_text'].startswith(EXTRACT_ERROR_PREFIX):
+                self.md_section_cache.set(cache_keys[i], sections[i])
+        
+        return sections
+    
+    @staticmethod
+    def _md_section_cache_key(pdf_path, meta_path):
+        """
+        生成Markdown段落缓存的键，PDF或元数据文件被修改后键随之改变
+        
+        参数:
+            pdf_path (str): PDF文件路径
+            meta_path (str): 元数据文件路径
             
-            for paper in results:
-                markdown += f"## {paper['title']}\n\n"
-                markdown += f"**ID:** {paper['id']}  \n"
-                markdown += f"**作者:** {', '.join(paper['authors'])}  \n"
-                markdown += f"**发布日期:** {paper['published']}  \n\n"
-                markdown += f"### 摘要\n\n{paper['summary']}\n\n"
-                markdown += f"### 提取的内容\n\n{paper['extracted_text']}\n\n"
-                markdown += "---\n\n"
-                
-            return markdown 
+        返回:
+            str: 缓存键，无法获取文件信息时返回None
+        """
+        try:
+            pdf_stat = os.stat(pdf_path)
+            meta_stat = os.stat(meta_path)
+        except OSError:
+            return None
+        return (
+            f"{PDF_BACKEND}|{SUMMARY_LENGTH}|{os.path.abspath(pdf_path)}|{pdf_stat.st_mtime_ns}|{pdf_stat.st_size}|"
+            f"{meta_stat.st_mtime_ns}|{meta_stat.st_size}"
+        ) 
 
     def add_paper(self, paper_data, local_path):
         """
@@ -120,18 +577,27 @@ class PaperManager:
         返回:
             bool: 是否添加成功
         """
-        # 读取当前论文数据
-        papers = self._load_papers()
-        
-        # 添加下载日期和本地路径
-        paper_data['download_date'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        paper_data['local_path'] = local_path
-        
-        # 添加到论文集合中
-        papers[paper_data['id']] = paper_data
+        # 已存在的论文原地更新，保持在论文列表中的位置不变
+        try:
+            with self._transaction() as conn:
+                # 添加下载日期和本地路径，批量添加的论文使用同一个下载日期
+                paper_data['download_date'] = self._batch_ts or datetime.now().strftime(_TS_FMT)
+                paper_data['local_path'] = local_path
+                data = json_dumps(paper_data).decode('utf-8')
+                
+                conn.execute(
+                    "INSERT INTO papers (id, data, download_date, local_path) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET "
+                    "data = excluded.data, download_date = excluded.download_date, local_path = excluded.local_path",
+                    (paper_data['id'], data, paper_data['download_date'], local_path)
+                )
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'papers_version'")
+        except (sqlite3.Error, TypeError) as e:
+            logger.warning("保存论文出错: %s", e)
+            return False
         
-        # 保存更新
-        return self._save_papers(papers)
+        self._maybe_export()
+        return True
     
     def get_paper(self, paper_id):
         """
@@ -143,19 +609,112 @@ class PaperManager:
         返回:
             dict: 论文信息，如果不存在则返回None
         """
-        papers = self._load_papers()
-        return papers.get(paper_id)
+        rows = self._query("SELECT data FROM papers WHERE id = ?", (paper_id,))
+        return json_loads(rows[0][0]) if rows else None
     
     def get_all_papers(self):
         """
         获取所有已保存的论文
         
         返回:
-            list: 所有论文的列表
+            list: 所有论文的列表，按添加顺序排列
+        """
+        return [json_loads(data) for (data,) in self._query("SELECT data FROM papers ORDER BY rowid")]
+    
+    def get_version(self):
+        """
+        获取论文数据的版本标识，论文数据被修改后版本标识会改变
+        
+        返回:
+            int: 论文数据的版本号，读取失败时返回None
+        """
+        rows = self._query("SELECT value FROM meta WHERE key = 'papers_version'")
+        return rows[0][0] if rows else None
+    
+    @contextmanager
+    def batch(self):
+        """
+        批量修改论文和分类数据，期间的所有修改在同一个事务中，结束时只提交一次
+        
+        用法:
+            with paper_manager.batch():
+                paper_manager.add_category("分类")
+                paper_manager.add_paper_to_category(paper_id, "分类")
+        """
+        with self._db_lock:
+            if self._batching:
+                # 已在批量修改中，由外层统一提交
+                yield self
+                return
+            
+            self._batching = True
+            self._batch_ts = datetime.now().strftime(_TS_FMT)
+            try:
+                with self._conn:
+                    yield self
+            finally:
+                self._batching = False
+                self._batch_ts = None
+        
+        # 批量修改期间的修改在结束时立即导出
+        self._flush_export()
+    
+    def export_json(self):
+        """
+        将论文和分类数据导出为JSON文件，便于备份和查看
+        
+        返回:
+            bool: 是否导出成功
+        """
+        try:
+            with self._db_lock:
+                papers = {paper['id']: paper for paper in self.get_all_papers()}
+                categories = {name: [] for (name,) in self._conn.execute("SELECT name FROM categories ORDER BY rowid")}
+                for category_name, paper_id in self._conn.execute(
+                    "SELECT category, paper_id FROM category_members ORDER BY rowid"
+                ):
+                    categories.setdefault(category_name, []).append(paper_id)
+            
+            _write_file_atomic(self.papers_file, json_dumps(papers, indent=True))
+            _write_file_atomic(self.categories_file, json_dumps({"categories": categories, "default": []}, indent=True))
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("导出论文数据出错: %s", e)
+            return False
+        
+        self._last_export = time.monotonic()
+        return True
+    
+    def get_download_states(self):
+        """
+        获取所有论文的下载状态
+        
+        返回:
+            dict: 论文ID到下载状态的映射，每个状态包含state、message和ts（更新时间戳）
+        """
+        with self._downloads_lock:
+            return dict(self._load_downloads())
+    
+    def set_download_state(self, paper_id, state, message=""):
+        """
+        记录论文的下载状态
+        
+        参数:
+            paper_id (str): 论文ID
+            state (str): 下载状态，如downloading、success或error
+            message (str): 状态说明
+            
+        返回:
+            bool: 是否保存成功
         """
-        papers = self._load_papers()
-        # 将字典转换为列表
-        return list(papers.values())
+        with self._downloads_lock:
+            now = time.time()
+            # 只保留最近更新的记录，文件大小不会随下载过的论文数量增长
+            downloads = {
+                key: record for key, record in self._load_downloads().items()
+                if now - record.get("ts", 0) < DOWNLOAD_STATE_TTL
+            }
+            downloads[paper_id] = {"state": state, "message": message, "ts": now}
+            return self._save_downloads(downloads)
     
     def add_category(self, category_name):
         """
@@ -167,17 +726,20 @@ class PaperManager:
         返回:
             bool: 是否添加成功
         """
-        categories = self._load_categories()
-        
-        # 检查分类是否已存在
-        if category_name in categories['categories']:
-            return True  # 分类已存在，视为成功
-        
-        # 添加新分类
-        categories['categories'][category_name] = []
+        try:
+            with self._transaction() as conn:
+                # 检查分类是否已存在
+                if self._category_exists(conn, category_name):
+                    return True  # 分类已存在，视为成功
+                
+                # 添加新分类
+                conn.execute("INSERT INTO categories (name) VALUES (?)", (category_name,))
+        except sqlite3.Error as e:
+            logger.warning("保存分类出错: %s", e)
+            return False
         
-        # 保存分类
-        return self._save_categories(categories)
+        self._maybe_export()
+        return True
     
     def add_paper_to_category(self, paper_id, category_name):
         """
@@ -190,21 +752,56 @@ class PaperManager:
         返回:
             bool: 是否添加成功
         """
-        categories = self._load_categories()
-        
-        # 检查分类是否存在
-        if category_name not in categories['categories']:
+        try:
+            with self._transaction() as conn:
+                # 检查分类是否存在
+                if not self._category_exists(conn, category_name):
+                    return False
+                
+                # 将论文添加到分类，主键保证同一论文只记录一次，已在分类中时视为成功
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO category_members (category, paper_id) VALUES (?, ?)",
+                    (category_name, paper_id)
+                )
+                if not cursor.rowcount:
+                    return True
+        except sqlite3.Error as e:
+            logger.warning("保存分类出错: %s", e)
             return False
         
-        # 检查论文是否已在分类中
-        if paper_id in categories['categories'][category_name]:
-            return True  # 论文已在分类中，视为成功
+        self._maybe_export()
+        return True
+    
+    def add_papers_to_category(self, paper_ids, category_name):
+        """
+        将多篇论文添加到指定分类，在一个事务中完成
         
-        # 将论文添加到分类
-        categories['categories'][category_name].append(paper_id)
+        参数:
+            paper_ids (list): 论文ID列表
+            category_name (str): 分类名称
+            
+        返回:
+            bool: 是否添加成功
+        """
+        try:
+            with self._transaction() as conn:
+                # 检查分类是否存在
+                if not self._category_exists(conn, category_name):
+                    return False
+                
+                # 按原有顺序添加，已在分类中的论文和重复的ID由主键忽略
+                cursor = conn.executemany(
+                    "INSERT OR IGNORE INTO category_members (category, paper_id) VALUES (?, ?)",
+                    [(category_name, paper_id) for paper_id in paper_ids]
+                )
+                if not cursor.rowcount:
+                    return True  # 论文都已在分类中，视为成功
+        except sqlite3.Error as e:
+            logger.warning("保存分类出错: %s", e)
+            return False
         
-        # 保存分类
-        return self._save_categories(categories)
+        self._maybe_export()
+        return True
     
     def get_categories(self):
         """
@@ -213,8 +810,7 @@ class PaperManager:
         返回:
             list: 分类列表
         """
-        categories = self._load_categories()
-        return list(categories['categories'].keys())
+        return [name for (name,) in self._query("SELECT name FROM categories ORDER BY rowid")]
     
     def get_papers_by_category(self, category_name):
         """
@@ -226,13 +822,11 @@ class PaperManager:
         返回:
             list: 论文ID列表，如果分类不存在则返回空列表
         """
-        categories = self._load_categories()
-        
-        # 检查分类是否存在
-        if category_name not in categories['categories']:
-            return []
-        
-        return categories['categories'][category_name]
+        rows = self._query(
+            "SELECT paper_id FROM category_members WHERE category = ? ORDER BY rowid",
+            (category_name,)
+        )
+        return [paper_id for (paper_id,) in rows]
     
     def remove_paper_from_category(self, paper_id, category_name):
         """
@@ -245,21 +839,25 @@ class PaperManager:
         返回:
             bool: 是否移除成功
         """
-        categories = self._load_categories()
-        
-        # 检查分类是否存在
-        if category_name not in categories['categories']:
+        try:
+            with self._transaction() as conn:
+                # 检查分类是否存在
+                if not self._category_exists(conn, category_name):
+                    return False
+                
+                # 从分类中移除论文，论文不在分类中时不做任何修改，同样视为成功
+                cursor = conn.execute(
+                    "DELETE FROM category_members WHERE category = ? AND paper_id = ?",
+                    (category_name, paper_id)
+                )
+                if not cursor.rowcount:
+                    return True
+        except sqlite3.Error as e:
+            logger.warning("保存分类出错: %s", e)
             return False
         
-        # 检查论文是否在分类中
-        if paper_id not in categories['categories'][category_name]:
-            return True  # 论文不在分类中，视为成功
-        
-        # 从分类中移除论文
-        categories['categories'][category_name].remove(paper_id)
-        
-        # 保存分类
-        return self._save_categories(categories)
+        self._maybe_export()
+        return True
     
     def delete_category(self, category_name):
         """
@@ -271,74 +869,133 @@ class PaperManager:
         返回:
             bool: 是否删除成功
         """
-        categories = self._load_categories()
-        
-        # 检查分类是否存在
-        if category_name not in categories['categories']:
-            return True  # 分类不存在，视为成功
-        
-        # 删除分类
-        del categories['categories'][category_name]
-        
-        # 保存分类
-        return self._save_categories(categories)
+        try:
+            with self._transaction() as conn:
+                # 检查分类是否存在
+                if not self._category_exists(conn, category_name):
+                    return True  # 分类不存在，视为成功
+                
+                # 删除分类及其中的论文记录
+                conn.execute("DELETE FROM category_members WHERE category = ?", (category_name,))
+                conn.execute("DELETE FROM categories WHERE name = ?", (category_name,))
+        except sqlite3.Error as e:
+            logger.warning("保存分类出错: %s", e)
+            return False
         
-    def _load_papers(self):
+        self._maybe_export()
+        return True
+    
+    @staticmethod
+    def _category_exists(conn, category_name):
+        """检查分类是否存在"""
+        return conn.execute("SELECT 1 FROM categories WHERE name = ?", (category_name,)).fetchone() is not None
+    
+    @contextmanager
+    def _transaction(self):
         """
-        从文件加载论文数据
+        在事务中修改数据库，正常结束时提交，出错时回滚；批量修改期间由batch()统一提交
         
         返回:
-            dict: 论文数据
+            sqlite3.Connection: 数据库连接
         """
-        try:
-            with open(self.papers_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
+        with self._db_lock:
+            if self._batching:
+                yield self._conn
+            else:
+                with self._conn:
+                    yield self._conn
     
-    def _save_papers(self, papers):
+    def _query(self, sql, params=()):
         """
-        将论文数据保存到文件
+        执行查询语句
         
         参数:
-            papers (dict): 论文数据
+            sql (str): SQL查询语句
+            params (tuple): 查询参数
             
         返回:
-            bool: 是否保存成功
+            list: 查询结果的所有行，出错时返回空列表
         """
         try:
-            with open(self.papers_file, 'w') as f:
-                json.dump(papers, f, indent=2)
-            return True
-        except Exception:
-            return False
+            with self._db_lock:
+                return self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("读取论文数据出错: %s", e)
+            return []
     
-    def _load_categories(self):
+    def _maybe_export(self):
+        """
+        修改数据后定期导出JSON文件：距上次导出已超过JSON_EXPORT_INTERVAL秒时立即导出，
+        否则在到期时由后台定时器导出；批量修改期间等到结束时再导出
         """
-        从文件加载分类数据
+        with self._export_lock:
+            self._export_dirty = True
+            if self._batching:
+                return
+            
+            remaining = 0 if self._last_export is None else self._last_export + JSON_EXPORT_INTERVAL - time.monotonic()
+            if remaining > 0:
+                if self._export_timer is None:
+                    self._export_timer = threading.Timer(remaining, self._flush_export)
+                    self._export_timer.daemon = True
+                    self._export_timer.start()
+                return
+        
+        self._flush_export()
+    
+    def _flush_export(self):
+        """如果有尚未导出的修改，立即导出JSON文件"""
+        with self._export_lock:
+            if self._export_timer is not None:
+                self._export_timer.cancel()
+                self._export_timer = None
+            if not self._export_dirty:
+                return
+            self._export_dirty = False
+        
+        if not self.export_json():
+            # 导出失败时保留未导出标记，下次修改或退出时重试
+            with self._export_lock:
+                self._export_dirty = True
+    
+    def _load_downloads(self):
+        """
+        从文件加载下载状态
         
         返回:
-            dict: 分类数据
+            dict: 下载状态数据，调用方不应修改
         """
         try:
-            with open(self.categories_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {"categories": {}, "default": []}
+            stat = os.stat(self.downloads_file)
+        except FileNotFoundError:
+            return {}
+        
+        # 文件被原子替换后inode也会改变
+        stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if self._downloads_cache is None or stamp != self._downloads_stamp:
+            self._downloads_cache = _read_json(self.downloads_file, {})
+            self._downloads_stamp = stamp
+        return self._downloads_cache
     
-    def _save_categories(self, categories):
+    def _save_downloads(self, downloads):
         """
-        将分类数据保存到文件
+        将下载状态保存到文件
         
         参数:
-            categories (dict): 分类数据
+            downloads (dict): 下载状态数据
             
         返回:
             bool: 是否保存成功
         """
         try:
-            with open(self.categories_file, 'w') as f:
-                json.dump(categories, f, indent=2)
-            return True
+            _write_file_atomic(self.downloads_file, json_dumps(downloads, indent=True))
         except Exception:
-            return False 
\ No newline at end of file
+            return False
+        
+        self._downloads_cache = downloads
+        try:
+            stat = os.stat(self.downloads_file)
+            self._downloads_stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            self._downloads_cache = None
+        return True